@@ -1,27 +1,40 @@
 # app.py
-import os
+import time
 import streamlit as st
 import pandas as pd
-from collections import Counter
 
-from utils.extract_text import extract_text
-from utils.scorer import evaluate_resume
-from utils.preprocess import extract_sections
+from utils.extract_text import extract_text_cached, content_hash
+from utils.jobs import JobManager
+from utils.store import get_store
 from utils.llm_utils import generate_feedback
+from utils.embeddings import cache_stats, start_warmup, model_status
+from utils import metrics, skill_gaps
 
 st.set_page_config(page_title="Resume Relevance — Final MVP", layout="wide")
 
-# ensure temp dir exists
-TEMP_DIR = "temp"
-os.makedirs(TEMP_DIR, exist_ok=True)
+# load the embedding model in the background while the page is used (once per process)
+start_warmup()
+
+@st.cache_resource
+def get_jobs():
+    # evaluation jobs run here, outside the script-rerun cycle (shared by all sessions);
+    # scores persist in the local results store so past runs can be reopened
+    return JobManager(store=get_store())
+
+# why extract_text stopped reading a PDF early (RESUME_PDF_* limits)
+_TRUNCATED = {"pages": "page limit", "chars": "character limit", "time": "time limit"}
 
 # session state
-if "results" not in st.session_state:
-    st.session_state.results = []
+if "scores" not in st.session_state:
+    st.session_state.scores = None   # ScoreMatrix of the last evaluation
 if "jd_texts" not in st.session_state:
     st.session_state.jd_texts = []
 if "jd_names" not in st.session_state:
     st.session_state.jd_names = []
+if "jd_hashes" not in st.session_state:
+    st.session_state.jd_hashes = set()
+if "job_key" not in st.session_state:
+    st.session_state.job_key = None   # evaluation job this session is following
 
 st.title("🚀 Automated Resume Relevance Check — Final MVP")
 
@@ -30,8 +43,40 @@ st.sidebar.header("Settings")
 use_llm = st.sidebar.checkbox("Enable LLM suggestions (OpenAI key required)", value=False)
 hard_weight = st.sidebar.slider("Hard score weight", 0.0, 1.0, 0.5)
 semantic_weight = round(1.0 - hard_weight, 2)
+min_hard = st.sidebar.number_input("Cascade: only embed pairs with hard score ≥ (0 = score all)",
+                                   min_value=0.0, max_value=100.0, value=0.0, step=5.0)
+dedup = st.sidebar.checkbox("Score near-duplicate resumes once", value=True,
+                            help="Resumes whose text is at least 80% the same share one evaluation.")
 st.sidebar.markdown("---")
 st.sidebar.write("Flow: Upload JD(s) → Upload Resumes → Run Evaluation → Inspect & Download")
+_model = model_status()
+if _model["state"] == "ready":
+    st.sidebar.caption("Embedding model: ready" + (f" (loaded in {_model['seconds']}s)" if _model["seconds"] else ""))
+elif _model["state"] == "error":
+    st.sidebar.warning(f"Embedding model failed to load: {_model['error']}")
+else:
+    st.sidebar.caption("Embedding model: warming up… (evaluation will wait for it)")
+_cache = cache_stats()
+if _cache:
+    st.sidebar.caption(f"Embedding cache: {_cache['hits']} hits / {_cache['misses']} misses, {_cache['entries']} stored")
+_store = get_store()
+if _store is not None:
+    _runs = _store.list_runs()
+    if _runs:
+        with st.sidebar.expander("Past runs", expanded=False):
+            labels = {r["id"]: f"#{r['id']} {r['name']} — {r['n_resumes']} resumes × {r['n_jds']} JDs" for r in _runs}
+            run_id = st.selectbox("Run", list(labels), format_func=labels.get)
+            if st.button("Open run"):
+                run = _store.load_run(run_id)
+                st.session_state.scores = run["scores"]
+                st.session_state.jd_texts = run["jd_texts"]
+                st.session_state.jd_names = run["jd_names"]
+                # hashes are of uploaded file bytes, which a stored run does not keep: forget them so
+                # files uploaded before the switch are added to the opened run's JDs again
+                st.session_state.jd_hashes = set()
+                st.session_state.job_key = None
+collect_metrics = st.sidebar.checkbox("Collect timing metrics", value=metrics.enabled())
+metrics.enable(collect_metrics)
 
 # Section: Job Descriptions
 st.header("1) Job Description(s)")
@@ -44,14 +89,22 @@ if st.button("Add pasted JD") and jd_text_input.strip():
     st.success("Primary JD added.")
 
 if uploaded_jds:
+    added = 0
     for f in uploaded_jds:
-        path = os.path.join(TEMP_DIR, f.name)
-        with open(path, "wb") as out:
-            out.write(f.getbuffer())
-        txt = extract_text(path)
+        data = f.getvalue()
+        h = content_hash(data)
+        if h in st.session_state.jd_hashes:
+            continue  # already added on an earlier rerun
+        status = {}
+        txt = extract_text_cached(data, f.name, status)
+        if status["truncated"]:
+            st.warning(f"{f.name}: only the beginning was read ({_TRUNCATED[status['truncated']]}).")
+        st.session_state.jd_hashes.add(h)
         st.session_state.jd_texts.append(txt)
         st.session_state.jd_names.append(f.name)
-    st.success(f"Added {len(uploaded_jds)} JD(s).")
+        added += 1
+    if added:
+        st.success(f"Added {added} JD(s).")
 
 if st.session_state.jd_texts:
     st.markdown("**Current JDs:**")
@@ -69,40 +122,74 @@ if st.button("Run Evaluation"):
     elif not uploaded_resumes:
         st.error("Please upload at least one resume.")
     else:
-        st.session_state.results = []  # reset previous results
-        with st.spinner("Evaluating resumes..."):
-            for f in uploaded_resumes:
-                # save to temp and extract
-                path = os.path.join(TEMP_DIR, f.name)
-                with open(path, "wb") as out:
-                    out.write(f.getbuffer())
-                resume_txt = extract_text(path)
-                # evaluate against each JD and pick best
-                per_jd = []
-                for j_idx, jd in enumerate(st.session_state.jd_texts):
-                    r = evaluate_resume(f.name, resume_txt, jd, hard_weight=hard_weight, semantic_weight=semantic_weight)
-                    r["jd_index"] = j_idx
-                    r["jd_name"] = st.session_state.jd_names[j_idx] if j_idx < len(st.session_state.jd_names) else f"JD_{j_idx}"
-                    per_jd.append(r)
-                # pick best final_score (tie-breaker semantic)
-                best = sorted(per_jd, key=lambda x: (x["final_score"], x["semantic_score"]), reverse=True)[0]
-                st.session_state.results.append(best)
-        st.success("Evaluation completed!")
-
-# Show results table
-if st.session_state.results:
-    df = pd.DataFrame(st.session_state.results).sort_values("final_score", ascending=False).reset_index(drop=True)
+        # score every resume against every JD once, in the background; weights are applied at display time
+        jd_names = [st.session_state.jd_names[j] if j < len(st.session_state.jd_names) else f"JD_{j}"
+                    for j in range(len(st.session_state.jd_texts))]
+        job = get_jobs().submit([(f.name, f.getvalue()) for f in uploaded_resumes],
+                                st.session_state.jd_texts, jd_names, min_hard=min_hard or None,
+                                dedup=0.8 if dedup else None)
+        st.session_state.job_key = job.key
+        st.session_state.scores = None   # filled in below once the job (or its cached result) is done
+
+job = get_jobs().get(st.session_state.job_key) if st.session_state.job_key else None
+if job is not None and job.running:
+    st.progress(job.progress(), text=f"Evaluating resumes… {job.done}/{job.total} ({job.elapsed():.0f}s)")
+    if st.button("Cancel evaluation"):
+        job.cancel()
+    partial = job.partial()
+    if partial is not None and partial.shape[0]:
+        st.caption("Top results so far")
+        top = pd.DataFrame(partial.ranking(hard_weight, semantic_weight, sort=True), copy=False).head(10)
+        st.dataframe(top[["filename","jd_name","final_score","verdict"]], hide_index=True)
+elif job is not None:
+    if job.state == "done" and st.session_state.scores is not job.result:
+        st.session_state.scores = job.result
+        for name, err in job.errors:
+            st.warning(f"Could not read {name}: {err}")
+        for name, limit in job.truncated:
+            st.warning(f"{name}: only the beginning was read ({_TRUNCATED[limit]}).")
+        reused = f" ({job.reused} of {job.reused + job.computed} pairs reused from earlier runs)" if job.reused else ""
+        dups = f" {job.duplicates} near-duplicate resume(s) reused another's scores." if job.duplicates else ""
+        st.success(f"Evaluation completed in {job.elapsed():.1f}s!{reused}{dups}")
+    elif job.state == "cancelled":
+        if st.session_state.scores is None:
+            st.session_state.scores = job.partial()   # keep what was scored before cancelling
+        st.warning(f"Evaluation cancelled after {job.done}/{job.total} resumes.")
+    elif job.state == "error":
+        st.error(f"Evaluation failed: {job.error}")
+
+# Show results table (best JD per resume under the current weights; no re-scoring)
+scores = st.session_state.scores
+if scores is not None and scores.shape[0]:
+    # columns come straight from the score arrays, already sorted; no copy into the frame
+    df = pd.DataFrame(scores.ranking(hard_weight, semantic_weight, sort=True), copy=False)
     st.subheader("Results")
-    st.dataframe(df[["filename","jd_name","final_score","verdict","matched_skills","missing_skills"]])
+    if scores.pruned:
+        st.caption(f"Cascade: semantic scoring skipped for {scores.pruned} of {scores.hard.size} "
+                   "resume/JD pairs (ranked on hard score alone).")
+    dups = [d for d in scores.duplicate_of if d is not None]
+    if dups:
+        st.caption(f"Near-duplicates: {len(dups)} resume(s) in {len(set(dups))} cluster(s) share the scores of "
+                   "the resume named in duplicate_of.")
+        st.dataframe(df[["filename","jd_name","final_score","verdict","duplicate_of","matched_skills","missing_skills"]])
+    else:
+        st.dataframe(df[["filename","jd_name","final_score","verdict","matched_skills","missing_skills"]])
 
     # analytics - skill gap
     st.subheader("Skill-gap analytics")
-    cnt = Counter()
-    for m in df["missing_skills"].fillna(""):
-        for s in [x.strip().lower() for x in str(m).split(",") if x.strip()]:
-            cnt[s] += 1
-    if cnt:
-        top = cnt.most_common(15)
+    slice_by = st.radio("Slice missing skills by", ["All resumes", "JD", "Verdict"], horizontal=True)
+    if slice_by == "JD":
+        groups = skill_gaps.skills_by_jd(scores, 15, hard_weight, semantic_weight)
+        group = st.selectbox("JD", list(groups), format_func=lambda j: f"{j + 1}. {scores.jd_names[j]}")
+        label = scores.jd_names[group]
+    elif slice_by == "Verdict":
+        groups = skill_gaps.skills_by_verdict(scores, 15, hard_weight, semantic_weight)
+        group = label = st.selectbox("Verdict", list(groups))
+    else:
+        groups = {"all": skill_gaps.top_skills(scores, 15, hard_weight, semantic_weight)}
+        group = label = "all"
+    top = groups[group]
+    if top:
         skills = [k for k,v in top]
         counts = [v for k,v in top]
         import matplotlib.pyplot as plt
@@ -111,15 +198,21 @@ if st.session_state.results:
         ax.set_yticks(range(len(skills)))
         ax.set_yticklabels(skills[::-1])
         ax.set_xlabel("Missing count (how many resumes lack this skill)")
-        ax.set_title("Top missing skills across uploaded resumes")
+        ax.set_title("Top missing skills across uploaded resumes" if group == "all" else f"Top missing skills — {label}")
         st.pyplot(fig)
+        pairs = skill_gaps.top_pairs(skill_gaps.cooccurrence(scores, hard_weight, semantic_weight), scores.skills, 10)
+        if pairs:
+            with st.expander("Skills most often missing together"):
+                st.dataframe(pd.DataFrame(pairs, columns=["skill", "also missing", "resumes"]), hide_index=True)
     else:
         st.info("No missing-skills data to show yet.")
 
     # Inspect candidate
     st.subheader("Inspect candidate")
     idx = st.number_input("Choose candidate index", min_value=0, max_value=len(df)-1, value=0, step=1)
-    cand = st.session_state.results[int(idx)]
+    cand = df.iloc[int(idx)].to_dict()
+    doc = scores.document(cand["resume_index"])   # text is only inflated here
+    cand["resume_text"] = doc.text
     st.markdown(f"### {cand['filename']}  — JD: {cand['jd_name']}")
     st.write("Final score:", cand["final_score"])
     st.write("Verdict:", cand["verdict"])
@@ -128,8 +221,7 @@ if st.session_state.results:
 
     # Show sections extracted (basic)
     if st.checkbox("Show parsed resume sections"):
-        sections = extract_sections(cand["resume_text"])
-        for k,v in sections.items():
+        for k,v in doc.sections.items():
             st.markdown(f"**{k.title()}**")
             st.write(v[:1000])  # show first 1000 chars
 
@@ -172,5 +264,23 @@ if st.session_state.results:
             st.error("LLM error: " + str(e))
 
     # download CSV
-    csv = df.to_csv(index=False).encode("utf-8")
+    csv = df.to_csv(index=False, columns=[c for c in df.columns if c != "resume_index"]).encode("utf-8")
     st.download_button("Download results CSV", csv, file_name="results.csv", mime="text/csv")
+
+# Timing panel (rendered last so it includes this run)
+if metrics.enabled():
+    with st.sidebar.expander("Timing per stage", expanded=False):
+        rows = metrics.snapshot()
+        if rows:
+            st.dataframe(pd.DataFrame(rows).drop(columns=["buckets"]), hide_index=True)
+        else:
+            st.write("No timings recorded yet.")
+        st.download_button("Download metrics JSON", metrics.to_json(), file_name="metrics.json", mime="application/json")
+        st.download_button("Download Prometheus text", metrics.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+        if st.button("Reset timings"):
+            metrics.reset()
+
+# keep polling while a job runs (after everything else has been drawn)
+if job is not None and job.running:
+    time.sleep(0.5)
+    st.rerun()
@@ -0,0 +1,254 @@
+# utils/batch.py
+"""
+Headless batch scoring: every resume in a directory against every JD in another.
+
+    python -m utils.batch --jds jds/ --resumes resumes/ --out results.parquet
+
+Resumes are streamed through extract -> score -> write in fixed-size chunks, so
+memory stays flat however large the corpus is. After each chunk is written a
+checkpoint (<out>.ckpt.json) records progress; re-running the same command after
+a crash or kill picks up at the first unfinished chunk, unless a JD or resume
+file was added, removed or changed (size or mtime) since, which starts over.
+Output is one row per (resume, JD) pair, as JSON Lines (.jsonl) or Parquet
+(.parquet, needs pyarrow).
+"""
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import hashlib
+import argparse
+import importlib.util
+
+from .extract_text import extract_many
+from .scorer import evaluate_batch
+from .document import Document
+
+SUPPORTED_EXTS = (".pdf", ".docx", ".doc", ".txt", ".md")
+
+def list_documents(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        for f in files:
+            if f.lower().endswith(SUPPORTED_EXTS):
+                paths.append(os.path.join(root, f))
+    return sorted(paths)
+
+def _fingerprint(jd_paths, resume_paths, settings):
+    # paths plus size and mtime: a file edited in place must not keep its old results
+    h = hashlib.sha256()
+    h.update(json.dumps(settings, sort_keys=True).encode("utf-8"))
+    for p in jd_paths + ["--"] + resume_paths:
+        try:
+            st = os.stat(p)
+            stamp = f"{st.st_size}:{st.st_mtime_ns}"
+        except OSError:
+            stamp = "-"
+        h.update(p.encode("utf-8"))
+        h.update(b"\0")
+        h.update(stamp.encode("ascii"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+# --- writers ---
+class JsonlWriter:
+    """
+    Appends rows to a .jsonl file. position() is the byte offset after the last
+    committed chunk; reopening at an offset drops anything written after it.
+    """
+
+    def __init__(self, path, offset=0):
+        self.path = path
+        mode = "r+b" if offset and os.path.exists(path) else "wb"
+        self._f = open(path, mode)
+        self._f.truncate(offset if mode == "r+b" else 0)
+        self._f.seek(0, os.SEEK_END)
+
+    def write_chunk(self, rows, chunk_idx):
+        for r in rows:
+            self._f.write((json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8"))
+        self._f.flush()
+        os.fsync(self._f.fileno())
+
+    def position(self):
+        return self._f.tell()
+
+    def finish(self):
+        self._f.close()
+
+class ParquetWriter:
+    """
+    Writes each chunk to its own part file under <out>.parts/, then streams the
+    parts into the final file one at a time when the run completes.
+    """
+
+    def __init__(self, path, chunks_done=0):
+        if importlib.util.find_spec("pyarrow") is None:
+            raise ImportError("pyarrow is required for Parquet output. `pip install pyarrow` or use a .jsonl output")
+        self.path = path
+        self.parts_dir = path + ".parts"
+        os.makedirs(self.parts_dir, exist_ok=True)
+        # drop parts from a chunk that was being written when the last run died
+        for p in glob.glob(os.path.join(self.parts_dir, "part-*.parquet")):
+            if int(os.path.basename(p)[5:10]) >= chunks_done:
+                os.remove(p)
+
+    @staticmethod
+    def schema():
+        import pyarrow as pa
+        return pa.schema([
+            ("filename", pa.string()), ("path", pa.string()),
+            ("jd_index", pa.int64()), ("jd_name", pa.string()),
+            ("hard_score", pa.float64()), ("semantic_score", pa.float64()), ("final_score", pa.float64()),
+            ("verdict", pa.string()), ("matched_skills", pa.string()), ("missing_skills", pa.string()),
+            ("is_best", pa.bool_()), ("error", pa.string()), ("truncated", pa.string()),
+        ])
+
+    def write_chunk(self, rows, chunk_idx):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not rows:
+            return
+        table = pa.Table.from_pylist(rows, schema=self.schema())
+        tmp = os.path.join(self.parts_dir, f"part-{chunk_idx:05d}.parquet.tmp")
+        pq.write_table(table, tmp)
+        os.replace(tmp, tmp[:-4])
+
+    def position(self):
+        return 0
+
+    def finish(self):
+        import pyarrow.parquet as pq
+        parts = sorted(glob.glob(os.path.join(self.parts_dir, "part-*.parquet")))
+        with pq.ParquetWriter(self.path, self.schema()) as writer:
+            for p in parts:
+                writer.write_table(pq.read_table(p, schema=self.schema()))
+        shutil.rmtree(self.parts_dir, ignore_errors=True)
+
+def _open_writer(out, chunks_done, offset):
+    if out.lower().endswith(".parquet"):
+        return ParquetWriter(out, chunks_done)
+    return JsonlWriter(out, offset)
+
+# --- checkpoint ---
+def _checkpoint_path(out):
+    return out + ".ckpt.json"
+
+def _load_checkpoint(out, fingerprint):
+    path = _checkpoint_path(out)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            ckpt = json.load(f)
+    except Exception:
+        return None
+    if ckpt.get("fingerprint") != fingerprint:
+        return None
+    return ckpt
+
+def _save_checkpoint(out, ckpt):
+    path = _checkpoint_path(out)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(ckpt, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+# --- scoring ---
+def score_chunk(paths, jds, jd_names, hard_weight=0.5, semantic_weight=0.5, workers=None):
+    """
+    Extract and score one chunk of resume files; returns output rows.
+    jds are JD texts or Documents (pass Documents so JDs are preprocessed once per run).
+    """
+    extracted = extract_many(paths, workers=workers)
+    ok = [(p, e) for p, e in zip(paths, extracted) if not e["error"]]
+    batch = evaluate_batch([(e["name"], e["text"]) for _, e in ok], jds,
+                           hard_weight=hard_weight, semantic_weight=semantic_weight)
+    rows = []
+    for (path, e), per_jd in zip(ok, batch):
+        best = max(range(len(per_jd)), key=lambda j: (per_jd[j]["final_score"], per_jd[j]["semantic_score"]))
+        for j, r in enumerate(per_jd):
+            rows.append({
+                "filename": r["filename"],
+                "path": path,
+                "jd_index": j,
+                "jd_name": jd_names[j],
+                "hard_score": float(r["hard_score"]),
+                "semantic_score": float(r["semantic_score"]),
+                "final_score": float(r["final_score"]),
+                "verdict": r["verdict"],
+                "matched_skills": r["matched_skills"],
+                "missing_skills": r["missing_skills"],
+                "is_best": j == best,
+                "error": None,
+                "truncated": e["truncated"],
+            })
+    for path, e in zip(paths, extracted):
+        if e["error"]:
+            rows.append({
+                "filename": e["name"], "path": path, "jd_index": None, "jd_name": None,
+                "hard_score": None, "semantic_score": None, "final_score": None,
+                "verdict": None, "matched_skills": None, "missing_skills": None,
+                "is_best": False, "error": e["error"], "truncated": None,
+            })
+    return rows
+
+def run(jds_dir, resumes_dir, out, chunk_size=256, workers=None, hard_weight=0.5, log=sys.stderr):
+    semantic_weight = round(1.0 - hard_weight, 2)
+    jd_paths = list_documents(jds_dir)
+    resume_paths = list_documents(resumes_dir)
+    if not jd_paths:
+        raise SystemExit(f"No JD files found in {jds_dir}")
+
+    settings = {"hard_weight": hard_weight, "chunk_size": chunk_size, "out": os.path.abspath(out)}
+    fingerprint = _fingerprint(jd_paths, resume_paths, settings)
+    ckpt = _load_checkpoint(out, fingerprint) or {"fingerprint": fingerprint, "chunks_done": 0, "offset": 0}
+    if ckpt["chunks_done"]:
+        print(f"Resuming from checkpoint: {ckpt['chunks_done']} chunk(s) already done", file=log)
+
+    jd_docs, jd_names = [], []
+    for path, e in zip(jd_paths, extract_many(jd_paths, workers=workers)):
+        if e["error"]:
+            print(f"Skipping JD {path}: {e['error']}", file=log)
+            continue
+        if e["truncated"]:
+            print(f"JD {path} was only partly read ({e['truncated']} limit)", file=log)
+        jd_docs.append(Document(e["name"], e["text"]))
+        jd_names.append(e["name"])
+    if not jd_docs:
+        raise SystemExit("No readable JD files")
+
+    n_chunks = (len(resume_paths) + chunk_size - 1) // chunk_size
+    writer = _open_writer(out, ckpt["chunks_done"], ckpt["offset"])
+    for c in range(ckpt["chunks_done"], n_chunks):
+        t0 = time.perf_counter()
+        paths = resume_paths[c * chunk_size:(c + 1) * chunk_size]
+        rows = score_chunk(paths, jd_docs, jd_names, hard_weight, semantic_weight, workers)
+        writer.write_chunk(rows, c)
+        ckpt["chunks_done"] = c + 1
+        ckpt["offset"] = writer.position()
+        _save_checkpoint(out, ckpt)
+        print(f"chunk {c + 1}/{n_chunks}: {len(paths)} resumes in {time.perf_counter() - t0:.1f}s", file=log)
+    writer.finish()
+    if os.path.exists(_checkpoint_path(out)):
+        os.remove(_checkpoint_path(out))
+    return n_chunks
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.batch", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--jds", required=True, help="directory of JD files")
+    ap.add_argument("--resumes", required=True, help="directory of resume files")
+    ap.add_argument("--out", required=True, help="output file (.jsonl or .parquet)")
+    ap.add_argument("--chunk-size", type=int, default=256, help="resumes per chunk (default 256)")
+    ap.add_argument("--workers", type=int, default=None, help="extraction processes (default: one per CPU)")
+    ap.add_argument("--hard-weight", type=float, default=0.5, help="weight of the hard-match score (default 0.5)")
+    args = ap.parse_args(argv)
+    run(args.jds, args.resumes, args.out, args.chunk_size, args.workers, args.hard_weight)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+# utils/benchmarks/cascade.py
+"""
+Cascade (hard-match prefilter) vs exhaustive scoring on the synthetic corpus.
+
+For each top-K (and min-hard) setting, scores the corpus in cascade mode and
+checks that every JD's top-N by final score is identical (same resumes, same
+order) to exhaustive scoring. Also reports pruned pairs, resumes never embedded,
+and "safe": whether, for every JD, no pruned pair could have reached the top-N
+even with a semantic score at the ceiling, i.e.
+
+    max pruned hard * hard_weight + ceiling * semantic_weight < N-th kept final
+
+The ceiling defaults to the best semantic score among the JD's scored pairs (a
+pruned resume matches fewer skills, so it is assumed not to be more similar
+than every kept one); --semantic-ceiling 100 makes it a proof, which a 0.5
+semantic weight (50 points) almost never passes.
+
+    python -m utils.benchmarks.cascade --resumes 2000 --jds 5 --top-n 10 --top-k 25 50 100 200
+    python -m utils.benchmarks.cascade --min-hard 20 40
+    python -m utils.benchmarks.cascade --check      # exit 1 if any top-N differs or is not safe
+
+Smaller K prunes more but can drop a resume whose semantic score would have
+lifted it into the top-N; the default sizes (100, 200) are the ones that hold
+on this corpus.
+"""
+import sys
+import time
+import argparse
+
+import numpy as np
+
+from .. import embeddings
+from ..document import Document
+from ..scorer import score_matrix
+from ..synth_corpus import generate_texts
+from . import standin_model
+
+def top_n(sm, jd, n, hard_weight=0.5, semantic_weight=0.5):
+    """
+    Resume indices of the n best for one JD: final desc, semantic desc, then input order.
+    """
+    final = sm.final(hard_weight, semantic_weight)[:, jd]
+    semantic = sm.semantic[:, jd]
+    return np.lexsort((np.arange(len(final)), -semantic, -final))[:n]
+
+def safe_by_bound(sm, jd, n, hard_weight=0.5, semantic_weight=0.5, semantic_ceiling=None):
+    """
+    True if no pruned pair's final score, with its semantic score at semantic_ceiling,
+    beats the n-th final score among scored pairs for this JD. semantic_ceiling None
+    uses the best semantic score among the JD's scored pairs; 100 is a strict proof.
+    """
+    scored = sm.scored[:, jd]
+    if scored.all():
+        return True
+    final = sm.final(hard_weight, semantic_weight)[:, jd]
+    kept = np.sort(final[scored])[::-1]
+    if len(kept) < n:
+        return False
+    ceiling = sm.semantic[scored, jd].max() if semantic_ceiling is None else semantic_ceiling
+    bound = sm.hard[~scored, jd] * hard_weight + ceiling * semantic_weight
+    return bool(bound.max() < kept[n - 1])
+
+def run(n_resumes=2000, n_jds=5, top_n_size=10, top_ks=(100, 200), min_hards=(), seed=0,
+        hard_weight=0.5, model="standin", semantic_ceiling=None):
+    if model == "standin":
+        standin_model.install()
+    saved_cache = embeddings.get_cache()
+    embeddings.set_cache(None)   # time the model, not the embedding cache
+    try:
+        resumes, jds = generate_texts(n_resumes, n_jds, seed=seed)
+        semantic_weight = round(1.0 - hard_weight, 2)
+
+        def fresh():
+            # new Documents each run so no embedding carries over between modes
+            return ([Document(name, text) for name, _, text in resumes],
+                    [Document(name, text) for name, text in jds])
+
+        docs, jd_docs = fresh()
+        t0 = time.perf_counter()
+        full = score_matrix(docs, jd_docs)
+        t_full = time.perf_counter() - t0
+        expected = [top_n(full, j, top_n_size, hard_weight, semantic_weight) for j in range(n_jds)]
+
+        rows = [{"cascade": "none", "seconds": round(t_full, 3), "pruned_pairs": 0, "embedded": n_resumes,
+                 "match": True, "safe": True}]
+        configs = [(f"top_k={k}", {"top_k": k}) for k in top_ks]
+        configs += [(f"min_hard={h:g}", {"min_hard": h}) for h in min_hards]
+        for label, cascade in configs:
+            docs, jd_docs = fresh()
+            t0 = time.perf_counter()
+            sm = score_matrix(docs, jd_docs, **cascade)
+            secs = time.perf_counter() - t0
+            got = [top_n(sm, j, top_n_size, hard_weight, semantic_weight) for j in range(n_jds)]
+            rows.append({
+                "cascade": label,
+                "seconds": round(secs, 3),
+                "pruned_pairs": sm.pruned,
+                "embedded": int(np.count_nonzero(sm.scored.any(axis=1))),
+                "match": all(np.array_equal(a, b) for a, b in zip(expected, got)),
+                "safe": all(safe_by_bound(sm, j, top_n_size, hard_weight, semantic_weight, semantic_ceiling)
+                            for j in range(n_jds)),
+            })
+    finally:
+        embeddings.set_cache(saved_cache)
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.cascade", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--resumes", type=int, default=2000)
+    ap.add_argument("--jds", type=int, default=5)
+    ap.add_argument("--top-n", type=int, default=10, help="shortlist size compared with exhaustive scoring")
+    ap.add_argument("--top-k", type=int, nargs="*", default=[100, 200], help="cascade sizes to try")
+    ap.add_argument("--min-hard", type=float, nargs="*", default=[], help="hard-score thresholds to try")
+    ap.add_argument("--hard-weight", type=float, default=0.5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", choices=["standin", "default"], default="standin")
+    ap.add_argument("--semantic-ceiling", type=float, default=None,
+                    help="semantic score assumed for pruned pairs in the safe bound (default: best scored one)")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any cascade top-N differs or is not safe")
+    args = ap.parse_args(argv)
+
+    rows = run(args.resumes, args.jds, args.top_n, tuple(args.top_k), tuple(args.min_hard),
+               args.seed, args.hard_weight, args.model, args.semantic_ceiling)
+    total = args.resumes * args.jds
+    print(f"{'cascade':>14s} {'seconds':>9s} {'pruned':>14s} {'embedded':>9s} {'top-N match':>12s} {'safe':>5s}")
+    for r in rows:
+        pruned = f"{r['pruned_pairs']} ({100.0 * r['pruned_pairs'] / total:.0f}%)"
+        print(f"{r['cascade']:>14s} {r['seconds']:>9} {pruned:>14s} {r['embedded']:>9} "
+              f"{str(r['match']):>12s} {str(r['safe']):>5s}")
+    if args.check and not all(r["match"] and r["safe"] for r in rows):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+# utils/benchmarks/dedup.py
+"""
+Near-duplicate skipping on a synthetic corpus with injected duplicates.
+
+A fraction of the resumes is resubmitted with the kind of differences seen in
+practice: re-flowed lines and bullets (a PDF vs DOCX export), a changed contact
+line, a sentence added or dropped. Scores the pool exhaustively and through
+NearDuplicateIndex, and reports docs/sec for both, how many resumes were
+actually scored, and precision/recall of the detected duplicates.
+
+Every resume pays minhash_ms_per_doc to be clustered and every skipped
+duplicate saves one resume's scoring cost, so dedup only pays off above
+break_even_dup_rate (clustering cost / exhaustive cost per resume). The bare
+stand-in model scores a resume in 2-4 ms, which puts that at 0.1-0.2; --encode-ms
+adds a per-resume encoder delay to the stand-in to measure the speedup at a
+real model's cost (a small sentence-transformer on one CPU core takes 10 ms or
+more per resume), or use --model default. Turn dedup off for pools expected to hold
+fewer duplicates than break_even_dup_rate (e.g. one export of distinct
+applicants): it then only adds the clustering cost.
+
+    python -m utils.benchmarks.dedup --resumes 1000 --dup-rate 0.3
+    python -m utils.benchmarks.dedup --resumes 1000 --dup-rate 0.3 --encode-ms 10
+    python -m utils.benchmarks.dedup --resumes 1000 --dup-rate 0.05
+"""
+import time
+import random
+import argparse
+
+import numpy as np
+
+from .. import embeddings
+from ..dedup import NearDuplicateIndex
+from ..document import Document
+from ..scorer import score_matrix
+from ..synth_corpus import generate_texts
+from . import standin_model
+
+def mutate(text, rng):
+    """
+    A near-duplicate of a resume: one or two cosmetic or small content edits.
+    """
+    lines = text.splitlines()
+    edits = rng.sample(["reflow", "contact", "append", "drop"], k=rng.randint(1, 2))
+    if "reflow" in edits:
+        lines = [("• " + l[2:]) if l.startswith("- ") else l for l in lines]
+        lines = [l + "\n" for l in lines]
+    if "contact" in edits and len(lines) > 1:
+        lines[1] = f"{lines[1].split('|')[0].strip()} | +91 {rng.randint(7000000000, 9999999999)}"
+    if "append" in edits:
+        lines.append("References available on request.")
+    if "drop" in edits and len(lines) > 12:
+        del lines[rng.randrange(10, len(lines))]
+    return "\n".join(lines)
+
+def make_pool(n_resumes, n_jds, dup_rate, seed=0):
+    """
+    ([(name, text)], jd_texts, truth) where truth[i] is the index of the original
+    resume i was copied from (i itself for originals).
+    """
+    rng = random.Random(seed)
+    n_orig = max(1, int(round(n_resumes * (1.0 - dup_rate))))
+    originals, jds = generate_texts(n_orig, n_jds, seed=seed)
+    pool = [(name, text) for name, _, text in originals]
+    truth = list(range(n_orig))
+    while len(pool) < n_resumes:
+        src = rng.randrange(n_orig)
+        pool.append((f"{originals[src][0]}_copy{len(pool)}", mutate(originals[src][2], rng)))
+        truth.append(src)
+    order = list(range(len(pool)))
+    rng.shuffle(order)
+    return [pool[i] for i in order], [t for _, t in jds], [truth[i] for i in order]
+
+def pair_metrics(labels, truth):
+    """
+    Precision/recall over the pairs of resumes placed in the same cluster.
+    """
+    def pairs(groups):
+        by = {}
+        for i, g in enumerate(groups):
+            by.setdefault(g, []).append(i)
+        return {(a, b) for members in by.values() for x, a in enumerate(members) for b in members[x + 1:]}
+    found, real = pairs(labels), pairs(truth)
+    tp = len(found & real)
+    return (tp / len(found) if found else 1.0), (tp / len(real) if real else 1.0)
+
+def run(n_resumes=1000, n_jds=3, dup_rate=0.3, threshold=0.8, seed=0, model="standin", encode_ms=0.0):
+    if model == "standin":
+        standin_model.install(encode_ms=encode_ms)
+    saved_cache = embeddings.get_cache()
+    embeddings.set_cache(None)   # time the model, not the embedding cache
+    try:
+        pool, jds, truth = make_pool(n_resumes, n_jds, dup_rate, seed)
+
+        docs = [Document(n, t) for n, t in pool]
+        t0 = time.perf_counter()
+        full = score_matrix(docs, jds)
+        t_full = time.perf_counter() - t0
+
+        docs = [Document(n, t) for n, t in pool]
+        index = NearDuplicateIndex(threshold)
+        t0 = time.perf_counter()
+        sm = index.score(docs, jds=jds)
+        t_dedup = time.perf_counter() - t0
+
+        # clustering cost alone (texts already cleaned)
+        t0 = time.perf_counter()
+        NearDuplicateIndex(threshold).assign(docs)
+        t_minhash = time.perf_counter() - t0
+    finally:
+        embeddings.set_cache(saved_cache)
+
+    # cluster label = position of the representative the resume was matched to
+    position = {name: i for i, name in enumerate(sm.filenames)}
+    labels = [i if d is None else position[d] for i, d in enumerate(sm.duplicate_of)]
+    precision, recall = pair_metrics(labels, truth)
+    best_full = full.best_jd()
+    best_dedup = sm.best_jd()
+    t_minhash_doc = t_minhash / max(1, n_resumes)
+    t_full_doc = t_full / max(1, n_resumes)
+    return {
+        "resumes": n_resumes,
+        "injected_duplicates": n_resumes - len(set(truth)),
+        "scored": len(index),
+        "exhaustive_docs_per_s": round(n_resumes / t_full, 1),
+        "dedup_docs_per_s": round(n_resumes / t_dedup, 1),
+        "speedup": round(t_full / t_dedup, 2),
+        "exhaustive_ms_per_doc": round(1000.0 * t_full_doc, 3),
+        "minhash_ms_per_doc": round(1000.0 * t_minhash_doc, 3),
+        "break_even_dup_rate": round(t_minhash_doc / t_full_doc, 4) if t_full_doc else None,
+        "precision": round(precision, 4),
+        "recall": round(recall, 4),
+        # how far copied scores are from scoring each copy itself
+        "max_final_delta": round(float(np.abs(full.final() - sm.final()).max()), 2) if n_resumes else 0.0,
+        "best_jd_agreement": round(float(np.mean(best_full == best_dedup)), 4) if n_resumes else 1.0,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.dedup", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--resumes", type=int, default=1000)
+    ap.add_argument("--jds", type=int, default=3)
+    ap.add_argument("--dup-rate", type=float, default=0.3, help="fraction of the pool that are injected copies")
+    ap.add_argument("--threshold", type=float, default=0.8, help="estimated Jaccard similarity for a duplicate")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", choices=["standin", "default"], default="standin")
+    ap.add_argument("--encode-ms", type=float, default=0.0, help="stand-in encoder delay per resume (ms)")
+    args = ap.parse_args(argv)
+
+    report = run(args.resumes, args.jds, args.dup_rate, args.threshold, args.seed, args.model, args.encode_ms)
+    for k, v in report.items():
+        print(f"{k:24s} {v}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# utils/benchmarks/embed_workers.py
+"""
+Embedding throughput against worker processes x torch threads per worker.
+
+Encodes the same synthetic resumes once in this process (the baseline) and then
+through a ShardedEncoder for every (workers, threads) combination, reporting
+docs/sec, the speedup over the baseline and the largest difference from the
+baseline vectors (should be ~0: sharding must not change results). Worker
+start-up (model load) is timed separately from encoding.
+
+    python -m utils.benchmarks.embed_workers --model default --workers 1 2 4 8 --threads 1 2 4
+"""
+import time
+import argparse
+
+import numpy as np
+
+from .. import embeddings
+from ..embed_pool import ShardedEncoder, set_torch_threads
+from ..synth_corpus import generate_texts
+from .standin_model import HashingEmbedder
+
+def run(n_docs=512, worker_counts=(1, 2, 4), thread_counts=(1, 2), batch_size=64, seed=0, model="standin"):
+    resumes, _ = generate_texts(n_docs, 1, seed=seed)
+    texts = [text for _, _, text in resumes]
+    factory = HashingEmbedder if model == "standin" else None
+
+    base_model = HashingEmbedder() if model == "standin" else embeddings.load_model()
+    set_torch_threads(max(thread_counts))
+    base_model.encode(texts[:batch_size], batch_size=batch_size)   # warm up
+    t0 = time.perf_counter()
+    base = np.asarray(base_model.encode(texts, batch_size=batch_size), dtype=np.float32)
+    t_base = time.perf_counter() - t0
+    rows = [{"workers": 0, "threads": max(thread_counts), "startup_s": 0.0, "seconds": round(t_base, 3),
+             "docs_per_s": round(n_docs / t_base, 1), "speedup": 1.0, "max_abs_diff": 0.0}]
+
+    for w in worker_counts:
+        for t in thread_counts:
+            enc = ShardedEncoder(w, t, factory=factory)
+            try:
+                t0 = time.perf_counter()
+                enc.encode(texts[:w], batch_size=1)   # start every worker
+                startup = time.perf_counter() - t0
+                t0 = time.perf_counter()
+                out = enc.encode(texts, batch_size=batch_size)
+                secs = time.perf_counter() - t0
+            finally:
+                enc.close()
+            rows.append({"workers": w, "threads": t, "startup_s": round(startup, 2), "seconds": round(secs, 3),
+                         "docs_per_s": round(n_docs / secs, 1), "speedup": round(t_base / secs, 2),
+                         "max_abs_diff": float(np.abs(out - base).max())})
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.embed_workers", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--docs", type=int, default=512)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 2], help="torch threads per worker")
+    ap.add_argument("--batch-size", type=int, default=64)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", choices=["standin", "default"], default="standin")
+    args = ap.parse_args(argv)
+
+    rows = run(args.docs, tuple(args.workers), tuple(args.threads), args.batch_size, args.seed, args.model)
+    print(f"{'workers':>8s} {'threads':>8s} {'startup s':>10s} {'seconds':>9s} {'docs/s':>9s} {'speedup':>8s} {'max diff':>10s}")
+    for r in rows:
+        label = "in-proc" if r["workers"] == 0 else r["workers"]
+        print(f"{label:>8} {r['threads']:>8} {r['startup_s']:>10} {r['seconds']:>9} {r['docs_per_s']:>9} "
+              f"{r['speedup']:>8} {r['max_abs_diff']:>10.2e}")
+
+if __name__ == "__main__":
+    main()
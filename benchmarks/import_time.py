@@ -0,0 +1,44 @@
+# utils/benchmarks/import_time.py
+"""
+Cold import time of the modules the app loads, each measured in a fresh
+interpreter (median of --repeat runs).
+
+    python -m utils.benchmarks.import_time
+"""
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+MODULES = ["extract_text", "preprocess", "scorer", "embeddings", "llm_utils"]
+
+_SNIPPET = "import time; t = time.perf_counter(); import {mod}; print(time.perf_counter() - t)"
+
+def import_seconds(module, repeat=3):
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _SNIPPET.format(mod=module)],
+                             capture_output=True, text=True, check=True)
+        runs.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(runs)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.import_time", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--json", action="store_true", help="print a JSON object instead of a table")
+    args = ap.parse_args(argv)
+
+    package = __package__.rsplit(".", 1)[0]
+    modules = [f"{package}.{m}" for m in MODULES]
+    result = {m: round(import_seconds(m, args.repeat), 3) for m in modules}
+    result["all"] = round(import_seconds(", ".join(modules), args.repeat), 3)
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        for name, secs in result.items():
+            print(f"{name:28s} {secs:8.3f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# utils/benchmarks/llm_stub.py
+"""
+generate_feedback_many against a local stub of the chat-completions endpoint.
+
+Starts an http.server on localhost that answers like the OpenAI API (after
+`--delay` seconds) and returns 429 with a Retry-After header to the first
+attempt of every `--reject-every`-th prompt. Runs the bulk generator against it
+with base_url pointed at the stub and checks, from the requests the server saw:
+
+  concurrency - no more than `--concurrency` requests were ever in flight
+  pacing      - requests never outran the rpm token bucket (a full minute of
+                budget up front, then rpm/60 per second)
+  backoff     - every rejected prompt was retried, no sooner than Retry-After
+  results     - every pair got the stub's answer, in input order
+
+Pacing only shows once more than `--rpm` requests are sent, so the defaults
+send a few hundred more than that at a high rpm.
+
+    python -m utils.benchmarks.llm_stub
+    python -m utils.benchmarks.llm_stub --pairs 300 --rpm 240 --concurrency 4
+    python -m utils.benchmarks.llm_stub --check     # exit 1 if any check fails
+
+Needs the openai package (>= 1.0); no API key or network access is used.
+"""
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .. import llm_utils
+
+class StubServer:
+    """
+    Threaded chat-completions stub recording in-flight counts and request times.
+    """
+
+    def __init__(self, delay=0.01, reject_every=20, retry_after=0.5):
+        self.delay = delay
+        self.reject_every = reject_every
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.arrivals = []    # monotonic time of every request
+        self.attempts = {}    # prompt -> [(arrived, status), ...]
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, name="llm-stub", daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"   # keep-alive, as the pooled client expects
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                prompt = body.get("messages", [{}])[-1].get("content", "")
+                now = time.monotonic()
+                with stub.lock:
+                    stub.in_flight += 1
+                    stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+                    stub.arrivals.append(now)
+                    seen = stub.attempts.setdefault(prompt, [])
+                    reject = not seen and stub.reject_every and len(stub.attempts) % stub.reject_every == 0
+                    seen.append((now, 429 if reject else 200))
+                try:
+                    time.sleep(stub.delay)
+                    if reject:
+                        self._send(429, {"error": {"message": "Rate limit reached", "type": "requests"}},
+                                   {"Retry-After": str(stub.retry_after)})
+                    else:
+                        self._send(200, stub.completion(body.get("model", "stub")))
+                finally:
+                    with stub.lock:
+                        stub.in_flight -= 1
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    @staticmethod
+    def completion(model):
+        content = json.dumps({"suggestions": ["stub suggestion"], "verdict": "stub verdict"})
+        return {"id": "chatcmpl-stub", "object": "chat.completion", "created": int(time.time()), "model": model,
+                "choices": [{"index": 0, "finish_reason": "stop",
+                             "message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}}
+
+def run(n_pairs=1300, concurrency=8, rpm=1200, delay=0.01, reject_every=20, retry_after=0.5):
+    pairs = [("Python developer with SQL and AWS.", f"Resume {i}: Python, SQL, Docker. Built data pipelines.",
+              ["aws"]) for i in range(n_pairs)]
+    with StubServer(delay, reject_every, retry_after) as stub:
+        t0 = time.monotonic()
+        results = llm_utils.generate_feedback_many(
+            pairs, concurrency=concurrency, rpm=rpm, openai_api_key="stub", base_url=stub.base_url,
+            prompt_budget=None, use_cache=False)
+        seconds = time.monotonic() - t0
+
+    # token bucket: by time t at most rpm + t * rpm / 60 requests can have started
+    slack = 0.05
+    over = [k + 1 - (rpm + (t - t0 + slack) * rpm / 60.0) for k, t in enumerate(sorted(stub.arrivals))]
+    rejected = {p: a for p, a in stub.attempts.items() if a[0][1] == 429}
+    waits = [a[1][0] - a[0][0] - delay for a in rejected.values() if len(a) > 1]
+    checks = {
+        "concurrency": stub.max_in_flight <= concurrency,
+        "pacing": max(over, default=0.0) <= 1.0,
+        "backoff": len(waits) == len(rejected) and all(w >= retry_after for w in waits),
+        "results": len(results) == n_pairs and all(r.get("verdict") == "stub verdict" for r in results),
+    }
+    return {
+        "pairs": n_pairs,
+        "requests": len(stub.arrivals),
+        "rejected": len(rejected),
+        "seconds": round(seconds, 2),
+        "min_pacing_seconds": round(max(0, len(stub.arrivals) - rpm) * 60.0 / rpm, 2),
+        "max_in_flight": stub.max_in_flight,
+        "min_retry_wait_s": round(min(waits), 3) if waits else None,
+        "checks": checks,
+    }
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.llm_stub", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--pairs", type=int, default=1300)
+    ap.add_argument("--concurrency", type=int, default=8)
+    ap.add_argument("--rpm", type=int, default=1200)
+    ap.add_argument("--delay", type=float, default=0.01, help="stub response time in seconds")
+    ap.add_argument("--reject-every", type=int, default=20, help="429 the first attempt of every N-th prompt")
+    ap.add_argument("--retry-after", type=float, default=0.5, help="Retry-After seconds sent with each 429")
+    ap.add_argument("--check", action="store_true", help="exit 1 if any check fails")
+    args = ap.parse_args(argv)
+
+    r = run(args.pairs, args.concurrency, args.rpm, args.delay, args.reject_every, args.retry_after)
+    for key, value in r.items():
+        if key != "checks":
+            print(f"  {key:20s} {value}")
+    for name, ok in r["checks"].items():
+        print(f"  {name:20s} {'ok' if ok else 'FAILED'}")
+    if args.check and not all(r["checks"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+# utils/benchmarks/pipeline.py
+"""
+Per-stage throughput benchmark for the scoring pipeline.
+
+Generates a deterministic synthetic corpus (txt/docx/pdf, several sizes), then
+times extraction, cleaning, skill matching, fuzzy matching, embedding and
+evaluate_resume end to end. For each stage the report has docs/sec, p50/p99
+latency and peak RSS; it is written as sorted JSON so two runs can be diffed.
+
+    python -m utils.benchmarks.pipeline --out bench_report.json
+    python -m utils.benchmarks.pipeline --baseline old_report.json
+
+By default embeddings come from an offline stand-in model (--model standin);
+use --model default to time the real sentence-transformers model.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+
+import numpy as np
+
+from .. import embeddings
+from ..extract_text import extract_text
+from ..preprocess import clean_text, extract_skills_from_text
+from ..scorer import match_skill_lists, evaluate_resume, evaluate_batch
+from ..synth_corpus import SIZES, FORMATS, generate_corpus, generate_texts
+from . import standin_model
+
+# --- memory ---
+def reset_peak_rss():
+    """
+    Reset the kernel's peak-RSS counter (Linux) so the next reading covers one stage.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+def peak_rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+# --- timing ---
+class StageTimer:
+
+    def __init__(self):
+        self.stages = {}
+
+    def run(self, name, fn, items, unit_size=None):
+        """
+        Call fn(item) for each item, recording per-call latency.
+        unit_size(item) gives the number of documents an item represents (default 1).
+        """
+        items = list(items)
+        if not items:
+            return
+        fn(items[0])  # warm-up: lazy loads, compiled matchers, caches of imports
+        reset_peak_rss()
+        lat = []
+        docs = 0
+        t_all = time.perf_counter()
+        for it in items:
+            t0 = time.perf_counter()
+            fn(it)
+            lat.append(time.perf_counter() - t0)
+            docs += unit_size(it) if unit_size else 1
+        total = time.perf_counter() - t_all
+        lat_ms = np.array(lat) * 1000.0
+        self.stages[name] = {
+            "calls": len(items),
+            "docs": docs,
+            "total_s": round(total, 4),
+            "docs_per_s": round(docs / total, 2) if total > 0 else None,
+            "p50_ms": round(float(np.percentile(lat_ms, 50)), 3),
+            "p99_ms": round(float(np.percentile(lat_ms, 99)), 3),
+            "peak_rss_mb": round(peak_rss_mb(), 1),
+        }
+
+def run_benchmark(n_resumes=60, n_jds=3, sizes=tuple(SIZES), formats=FORMATS, seed=0,
+                  model="standin", corpus_dir=None, batch_size=32):
+    if model == "standin":
+        standin_model.install()
+    saved_cache = embeddings.get_cache()
+    embeddings.set_cache(None)   # time the model, not the embedding cache
+
+    own_dir = corpus_dir is None
+    corpus_dir = corpus_dir or tempfile.mkdtemp(prefix="resume_bench_")
+    timer = StageTimer()
+    try:
+        manifest = generate_corpus(corpus_dir, n_resumes, n_jds, sizes, formats, seed)
+        resumes, jds = generate_texts(n_resumes, n_jds, sizes, seed)
+        jd_texts = [clean_text(t) for _, t in jds]
+        texts = [t for _, _, t in resumes]
+
+        # extraction, per format and size
+        for fmt in formats:
+            for size in sizes:
+                paths = [r["path"] for r in manifest["resumes"] if r["format"] == fmt and r["size"] == size]
+                timer.run(f"extract.{fmt}.{size}", extract_text, paths)
+
+        timer.run("clean", clean_text, texts)
+        cleaned = [clean_text(t) for t in texts]
+        timer.run("skills", extract_skills_from_text, cleaned)
+
+        resume_skills = [extract_skills_from_text(t) for t in cleaned]
+        jd_skills = [extract_skills_from_text(t) for t in jd_texts]
+        timer.run("fuzzy", lambda rs: [match_skill_lists(js, [rs]) for js in jd_skills], resume_skills)
+        timer.run("fuzzy_batch", lambda js: match_skill_lists(js, resume_skills), jd_skills,
+                  unit_size=lambda _: len(resume_skills))
+
+        timer.run("embed", lambda t: embeddings.embed_texts([t]), cleaned)
+        batches = [cleaned[i:i + batch_size] for i in range(0, len(cleaned), batch_size)]
+        timer.run("embed_batch", lambda b: embeddings.embed_texts(b, batch_size=batch_size), batches, unit_size=len)
+
+        for size in sizes:
+            pairs = [(name, t, jd) for name, sz, t in resumes if sz == size for _, jd in jds]
+            timer.run(f"evaluate_resume.{size}", lambda p: evaluate_resume(*p), pairs)
+        timer.run("evaluate_batch", lambda rs: evaluate_batch(rs, [t for _, t in jds]),
+                  [[(name, t) for name, _, t in resumes]], unit_size=lambda rs: len(rs) * len(jds))
+    finally:
+        embeddings.set_cache(saved_cache)
+        if own_dir:
+            shutil.rmtree(corpus_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "resumes": n_resumes, "jds": n_jds, "sizes": list(sizes), "formats": list(formats),
+            "seed": seed, "model": embeddings.MODEL_NAME, "batch_size": batch_size,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "stages": timer.stages,
+    }
+
+def compare(report, baseline):
+    """
+    Rows of (stage, baseline docs/s, current docs/s, ratio) for stages in both reports.
+    """
+    rows = []
+    for name, cur in sorted(report["stages"].items()):
+        old = baseline.get("stages", {}).get(name)
+        if not old or not old.get("docs_per_s") or not cur.get("docs_per_s"):
+            continue
+        rows.append((name, old["docs_per_s"], cur["docs_per_s"], round(cur["docs_per_s"] / old["docs_per_s"], 2)))
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.pipeline", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--resumes", type=int, default=60)
+    ap.add_argument("--jds", type=int, default=3)
+    ap.add_argument("--sizes", nargs="+", default=list(SIZES), choices=list(SIZES))
+    ap.add_argument("--formats", nargs="+", default=list(FORMATS), choices=list(FORMATS))
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", choices=["standin", "default"], default="standin")
+    ap.add_argument("--corpus-dir", default=None, help="keep the generated corpus here (default: temp dir)")
+    ap.add_argument("--out", default="bench_report.json")
+    ap.add_argument("--baseline", default=None, help="earlier report to compare docs/sec against")
+    args = ap.parse_args(argv)
+
+    report = run_benchmark(args.resumes, args.jds, tuple(args.sizes), tuple(args.formats),
+                           args.seed, args.model, args.corpus_dir)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+
+    print(f"{'stage':28s} {'docs/s':>10s} {'p50 ms':>9s} {'p99 ms':>9s} {'rss MB':>8s}")
+    for name, st in sorted(report["stages"].items()):
+        print(f"{name:28s} {st['docs_per_s']:>10} {st['p50_ms']:>9} {st['p99_ms']:>9} {st['peak_rss_mb']:>8}")
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        print("\nvs baseline (docs/s):")
+        for name, old, new, ratio in compare(report, baseline):
+            print(f"{name:28s} {old:>10} -> {new:>10}  x{ratio}")
+    print(f"\nReport written to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+# utils/benchmarks/quantize.py
+"""
+Accuracy and memory of quantized embedding storage against float32.
+
+Scores the synthetic corpus once in float32, then re-computes the semantic
+scores from float16 and int8 copies of the resume vectors (blocked dot on the
+stored codes, as ResumeIndex and the embedding cache use them) and reports:
+bytes per vector, max/mean semantic and final score deltas, verdict changes,
+per-JD top-N agreement, and ResumeIndex recall@k and search time.
+
+    python -m utils.benchmarks.quantize --resumes 5000 --jds 5
+"""
+import time
+import argparse
+
+import numpy as np
+
+from .. import embeddings
+from ..document import Document, embed_documents
+from ..quantize import DTYPES, quantize, dot, nbytes
+from ..scorer import score_matrix, verdicts_from_scores
+from ..synth_corpus import generate_texts
+from ..vector_index import ResumeIndex
+from . import standin_model
+
+def run(n_resumes=5000, n_jds=5, top_n=10, k=50, seed=0, model="standin"):
+    if model == "standin":
+        standin_model.install()
+    saved_cache = embeddings.get_cache()
+    embeddings.set_cache(None)
+    try:
+        resumes, jds = generate_texts(n_resumes, n_jds, seed=seed)
+        docs = [Document(name, text) for name, _, text in resumes]
+        jd_docs = [Document(name, text) for name, text in jds]
+        sm = score_matrix(docs, jd_docs)
+        res_emb = embed_documents(docs)
+        jd_emb = embed_documents(jd_docs)
+    finally:
+        embeddings.set_cache(saved_cache)
+
+    base_final = sm.final()
+    base_verdict = verdicts_from_scores(base_final.ravel())
+    base_top = [set(np.argsort(-base_final[:, j], kind="stable")[:top_n]) for j in range(n_jds)]
+    ids = list(range(n_resumes))
+
+    reference = None
+    rows = []
+    for dtype in DTYPES:
+        codes, scales = quantize(res_emb, dtype)
+        t0 = time.perf_counter()
+        sims = dot(codes, scales, jd_emb)
+        t_dot = time.perf_counter() - t0
+        semantic = np.round(np.clip(sims.astype(np.float64), 0.0, 1.0) * 100.0, 2)
+        final = np.round(sm.hard * 0.5 + semantic * 0.5, 2)
+
+        index = ResumeIndex(res_emb.shape[1], dtype)
+        index.add(ids, res_emb)
+        t0 = time.perf_counter()
+        hits = index.search(jd_emb, k)
+        t_search = time.perf_counter() - t0
+        found = [{i for i, _ in h} for h in hits]
+        if reference is None:
+            reference = found
+
+        rows.append({
+            "dtype": dtype,
+            "bytes_per_vector": round(nbytes(codes, scales) / max(1, n_resumes), 1),
+            "index_mb": round(index.nbytes / 1e6, 2),
+            "dot_ms": round(1000.0 * t_dot, 2),
+            "search_ms": round(1000.0 * t_search, 2),
+            "max_semantic_delta": round(float(np.abs(semantic - sm.semantic).max()), 2),
+            "mean_semantic_delta": round(float(np.abs(semantic - sm.semantic).mean()), 4),
+            "max_final_delta": round(float(np.abs(final - base_final).max()), 2),
+            "verdict_changes": int(np.count_nonzero(verdicts_from_scores(final.ravel()) != base_verdict)),
+            "top_n_agreement": round(float(np.mean([len(base_top[j] & set(np.argsort(-final[:, j], kind="stable")[:top_n])) / top_n
+                                                    for j in range(n_jds)])), 4),
+            f"recall@{k}": round(float(np.mean([len(a & b) / max(1, len(a)) for a, b in zip(reference, found)])), 4),
+        })
+    return rows
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m utils.benchmarks.quantize", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--resumes", type=int, default=5000)
+    ap.add_argument("--jds", type=int, default=5)
+    ap.add_argument("--top-n", type=int, default=10)
+    ap.add_argument("--k", type=int, default=50, help="neighbours compared for index recall")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--model", choices=["standin", "default"], default="standin")
+    args = ap.parse_args(argv)
+
+    rows = run(args.resumes, args.jds, args.top_n, args.k, args.seed, args.model)
+    for r in rows:
+        print(r["dtype"])
+        for key, value in r.items():
+            if key != "dtype":
+                print(f"  {key:20s} {value}")
+
+if __name__ == "__main__":
+    main()
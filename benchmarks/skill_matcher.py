@@ -0,0 +1,88 @@
+# utils/benchmarks/skill_matcher.py
+"""
+Compare the compiled SkillMatcher with the old per-skill substring scan.
+
+Run from the directory that contains the package:
+    python -m utils.benchmarks.skill_matcher --vocab 15000 --docs 200
+"""
+import argparse
+import random
+import string
+import time
+
+from ..preprocess import DEFAULT_SKILLS, clean_text
+from ..skill_matcher import SkillMatcher
+
+def legacy_extract_skills(text, skill_vocab):
+    # previous implementation of preprocess.extract_skills_from_text
+    text_l = clean_text(text).lower()
+    skills = set()
+    for s in skill_vocab:
+        if s.lower() in text_l:
+            skills.add(s.lower())
+    return sorted(list(skills))
+
+def make_vocab(size, seed=0):
+    rng = random.Random(seed)
+    vocab = list(dict.fromkeys(DEFAULT_SKILLS))
+    seen = set(vocab)
+    while len(vocab) < size:
+        words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9)))
+                 for _ in range(rng.choice([1, 1, 2, 3]))]
+        term = " ".join(words)
+        if term not in seen:
+            seen.add(term)
+            vocab.append(term)
+    return vocab
+
+def make_docs(vocab, n_docs, words_per_doc=600, seed=1):
+    rng = random.Random(seed)
+    filler = ["worked", "on", "the", "team", "built", "and", "delivered", "with", "using", "project"]
+    docs = []
+    for _ in range(n_docs):
+        words = []
+        while len(words) < words_per_doc:
+            if rng.random() < 0.05:
+                words.append(rng.choice(vocab))
+            else:
+                words.append(rng.choice(filler))
+        docs.append(" ".join(words))
+    return docs
+
+def _time(fn, docs):
+    t0 = time.perf_counter()
+    for d in docs:
+        fn(d)
+    return time.perf_counter() - t0
+
+def run(vocab_size=15000, n_docs=200, words_per_doc=600):
+    vocab = make_vocab(vocab_size)
+    docs = make_docs(vocab, n_docs, words_per_doc)
+
+    t0 = time.perf_counter()
+    matcher = SkillMatcher(vocab)
+    compile_s = time.perf_counter() - t0
+
+    new_s = _time(lambda d: matcher.find(clean_text(d)), docs)
+    old_s = _time(lambda d: legacy_extract_skills(d, vocab), docs)
+
+    return {
+        "vocab_size": len(vocab),
+        "docs": n_docs,
+        "compile_s": round(compile_s, 4),
+        "matcher_docs_per_s": round(n_docs / new_s, 1),
+        "legacy_docs_per_s": round(n_docs / old_s, 1),
+        "speedup": round(old_s / new_s, 1),
+    }
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--vocab", type=int, nargs="+", default=[30, 1000, 15000])
+    ap.add_argument("--docs", type=int, default=200)
+    ap.add_argument("--words", type=int, default=600)
+    args = ap.parse_args()
+    for size in args.vocab:
+        print(run(size, args.docs, args.words))
+
+if __name__ == "__main__":
+    main()
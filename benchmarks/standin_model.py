@@ -0,0 +1,54 @@
+# utils/benchmarks/standin_model.py
+"""
+Small offline stand-in for SentenceTransformer, for benchmarks and CI boxes
+without the real model. Vectors are signed feature hashes of word unigrams and
+bigrams, so similar texts still get similar vectors; nothing is downloaded.
+encode_ms adds a fixed delay per text, to stand in for a real encoder's cost.
+"""
+import zlib
+import re
+import time
+
+import numpy as np
+
+_TOKEN = re.compile(r"[a-z0-9+#.]+")
+
+class HashingEmbedder:
+
+    def __init__(self, dim=384, encode_ms=0.0):
+        self.dim = dim
+        self.encode_ms = encode_ms
+        self.max_seq_length = 256
+
+    @property
+    def name(self):
+        return f"hashing-standin-{self.dim}"
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        tokens = _TOKEN.findall(text.lower())
+        for feat in tokens + [a + " " + b for a, b in zip(tokens, tokens[1:])]:
+            h = zlib.crc32(feat.encode("utf-8"))
+            vec[h % self.dim] += 1.0 if (h >> 16) & 1 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        if self.encode_ms:
+            time.sleep(self.encode_ms * len(texts) / 1000.0)
+        out = np.stack([self._embed(t) for t in texts]) if texts else np.zeros((0, self.dim), dtype=np.float32)
+        return out[0] if single else out
+
+def install(dim=384, encode_ms=0.0):
+    """
+    Make embeddings.py use a HashingEmbedder; returns it.
+    """
+    from .. import embeddings
+    model = HashingEmbedder(dim, encode_ms)
+    embeddings.set_model(model, model.name)
+    return model
@@ -0,0 +1,218 @@
+# utils/dedup.py
+"""
+Near-duplicate resume detection (MinHash + LSH).
+
+Each document's cleaned, lowercased text is cut into word 3-shingles and
+summarised by a MinHash signature; the fraction of equal signature slots
+estimates the Jaccard similarity of the shingle sets. LSH buckets the
+signatures by bands so a lookup only compares against likely matches.
+
+Signatures use one-permutation hashing: every shingle is hashed once and only
+counts towards one of the num_perm slots, so signing costs O(shingles) rather
+than O(shingles x num_perm), and a whole batch is signed in a few numpy calls.
+
+NearDuplicateIndex.score() groups a batch (and everything seen in earlier
+batches) into clusters of near-duplicates: the first document of a cluster is
+scored, the others get a copy of its results and are flagged via duplicate_of.
+"""
+import zlib
+
+import numpy as np
+
+from .document import as_document
+from .result_store import TextStore
+from .scorer import ScoreMatrix, score_matrix
+
+# words are runs of [a-z0-9+#.]: every other byte (including UTF-8 ones) becomes a space
+_WORD_BYTES = frozenset(b"abcdefghijklmnopqrstuvwxyz0123456789+#.")
+_SPLIT = bytes(c if c in _WORD_BYTES else 0x20 for c in range(256))
+_MIX = np.uint64(0x9E3779B97F4A7C15)
+_EMPTY = np.uint64(0xFFFFFFFFFFFFFFFF)
+_MAX_WORDS = 200000      # word-hash memo size before it is dropped
+
+def shingles(text_lower, k=3, word_hashes=None):
+    """
+    64-bit hashes of the word k-shingles of an already lowercased text, in text order
+    (repeats kept). Each distinct word is crc32-hashed once, or looked up in the
+    `word_hashes` memo, and each shingle combines k consecutive word hashes.
+    """
+    words = text_lower.encode("utf-8").translate(_SPLIT).split()
+    if not words:
+        return np.empty(0, dtype=np.uint64)
+    ids = {} if word_hashes is None else word_hashes
+    for w in set(words).difference(ids):
+        ids[w] = zlib.crc32(w)
+    h = np.fromiter(map(ids.__getitem__, words), dtype=np.uint64, count=len(words))
+    k = min(k, len(h))
+    n = len(h) - k + 1
+    out = h[:n].copy()
+    for j in range(1, k):
+        out = out * _MIX + h[j:j + n]     # wraps mod 2**64
+    return out
+
+def _fmix(h):
+    # murmur3's 64-bit finaliser: every output bit depends on every input bit
+    h = h ^ (h >> np.uint64(33))
+    h *= np.uint64(0xFF51AFD7ED558CCD)
+    h ^= h >> np.uint64(33)
+    h *= np.uint64(0xC4CEB9FE1A85EC53)
+    h ^= h >> np.uint64(33)
+    return h
+
+def _densify(sig):
+    """
+    Fill empty slots from the next non-empty slot of the same row (circularly), offset
+    by the distance, so two short texts don't agree just on slots neither of them hit.
+    """
+    empty = sig == _EMPTY
+    rows = np.flatnonzero(empty.any(axis=1) & ~empty.all(axis=1))
+    if not len(rows):
+        return sig
+    sub, e = sig[rows], empty[rows]
+    p = sig.shape[1]
+    pos = np.where(np.concatenate([e, e], axis=1), 2 * p, np.arange(2 * p))
+    nxt = np.minimum.accumulate(pos[:, ::-1], axis=1)[:, ::-1][:, :p]
+    dist = (nxt - np.arange(p)).astype(np.uint64)
+    sig[rows] = np.where(e, np.take_along_axis(sub, nxt % p, axis=1) + (dist << np.uint64(32)), sub)
+    return sig
+
+class NearDuplicateIndex:
+    """
+    Streaming near-duplicate clustering. threshold is the estimated Jaccard
+    similarity above which two documents count as the same resume; bands x rows
+    must equal num_perm (16 x 8 puts the LSH S-curve midpoint near 0.7).
+    """
+
+    def __init__(self, threshold=0.8, num_perm=128, bands=16, shingle=3, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle = shingle
+        self._seed = np.uint64(np.random.default_rng(seed).integers(0, 1 << 63))
+        self._words = {}         # word -> crc32, shared by every text signed here
+        self._buckets = [{} for _ in range(bands)]
+        self._sigs = []          # signature per representative
+        self._names = []         # representative names
+        self._results = []       # (ScoreMatrix, row) holding each representative's scores
+
+    def __len__(self):
+        return len(self._sigs)
+
+    def signatures(self, texts_lower):
+        """
+        (n, num_perm) signatures of lowercased texts. Each shingle hash goes to slot
+        hash % num_perm and a slot keeps the smallest high half of its hashes.
+        """
+        if len(self._words) > _MAX_WORDS:
+            self._words = {}
+        n, p = len(texts_lower), self.num_perm
+        parts = [shingles(t, self.shingle, self._words) for t in texts_lower]
+        counts = np.fromiter(map(len, parts), dtype=np.int64, count=n)
+        sig = np.full(n * p, _EMPTY, dtype=np.uint64)
+        if counts.sum():
+            h = _fmix(np.concatenate(parts) ^ self._seed)
+            slot = np.repeat(np.arange(n, dtype=np.int64) * p, counts) + (h % np.uint64(p)).astype(np.int64)
+            np.minimum.at(sig, slot, h >> np.uint64(32))
+        return _densify(sig.reshape(n, p))
+
+    def signature(self, text_lower):
+        return self.signatures([text_lower])[0]
+
+    def query(self, sig):
+        """
+        Representative id most similar to sig with estimated Jaccard >= threshold, or None.
+        """
+        candidates = set()
+        for band, buckets in enumerate(self._buckets):
+            candidates.update(buckets.get(sig[band * self.rows:(band + 1) * self.rows].tobytes(), ()))
+        best, best_sim = None, self.threshold
+        for c in sorted(candidates):
+            sim = float(np.mean(self._sigs[c] == sig))
+            if sim >= best_sim:
+                best, best_sim = c, sim
+        return best
+
+    def add(self, sig, name, searchable=True):
+        """
+        New representative; searchable=False keeps it out of the LSH buckets, so
+        nothing is ever matched to it.
+        """
+        rep = len(self._sigs)
+        self._sigs.append(sig)
+        self._names.append(name)
+        self._results.append(None)
+        if not searchable:
+            return rep
+        for band, buckets in enumerate(self._buckets):
+            buckets.setdefault(sig[band * self.rows:(band + 1) * self.rows].tobytes(), []).append(rep)
+        return rep
+
+    def assign(self, docs):
+        """
+        For each Document: (representative id, is_new). New representatives are added.
+        A text without shingles (e.g. nothing extracted from a scanned PDF) is always
+        its own representative: empty signatures would all look identical.
+        """
+        out = []
+        for d, sig in zip(docs, self.signatures([d.lower for d in docs])):
+            if sig[0] == _EMPTY:   # densified rows are never empty, so this one has no shingles
+                out.append((self.add(sig, d.name, searchable=False), True))
+                continue
+            rep = self.query(sig)
+            out.append((rep, False) if rep is not None else (self.add(sig, d.name), True))
+        return out
+
+    def score(self, resumes, score=None, **kwargs):
+        """
+        Score only one member per near-duplicate cluster and copy its results to the rest.
+        `score(docs) -> ScoreMatrix` defaults to score_matrix(docs, **kwargs)
+        (kwargs must then include jds). Returns a ScoreMatrix over all resumes.
+        """
+        docs = [as_document(r) for r in resumes]
+        score = score or (lambda ds: score_matrix(ds, **kwargs))
+        if not docs:
+            return score([])
+        assigned = self.assign(docs)
+        fresh = [i for i, (_, new) in enumerate(assigned) if new]
+        if fresh:
+            sm_new = score([docs[i] for i in fresh])
+            for row, i in enumerate(fresh):
+                self._results[assigned[i][0]] = (sm_new, row)
+
+        # gather each resume's rows from whichever matrix holds its representative
+        sources, order = {}, []
+        for rep, _ in assigned:
+            sm, row = self._results[rep]
+            rows = sources.setdefault(id(sm), (sm, []))[1]
+            order.append((id(sm), len(rows)))
+            rows.append(row)
+        keys = list(sources)
+        offsets = np.cumsum([0] + [len(sources[k][1]) for k in keys])
+        stacked = ScoreMatrix.concat([sources[k][0].take(sources[k][1]) for k in keys])
+        out = stacked.take([offsets[keys.index(k)] + r for k, r in order])
+
+        texts = TextStore()
+        for d in docs:
+            texts.put(d.digest, d.text)
+        out.scored_as = list(out.digests)   # still the representatives' digests
+        out.filenames = np.array([d.name for d in docs], dtype=object)
+        out.digests = [d.digest for d in docs]
+        out.texts = texts
+        out.duplicate_of = np.array([None if new else self._names[rep] for rep, new in assigned], dtype=object)
+        return out
+
+def find_duplicates(texts, threshold=0.8, **kwargs):
+    """
+    Cluster label per text: the index of the first text in its near-duplicate cluster.
+    """
+    index = NearDuplicateIndex(threshold, **kwargs)
+    first = {}
+    labels = []
+    for i, (rep, new) in enumerate(index.assign([as_document(t) for t in texts])):
+        if new:
+            first[rep] = i
+        labels.append(first[rep])
+    return np.array(labels)
@@ -0,0 +1,89 @@
+# utils/document.py
+"""
+A resume or JD preprocessed once and reused for every comparison.
+
+Cleaning, lowercasing and hashing happen when the Document is built; the skill
+set (per vocabulary), sections and embedding are computed on first use and kept.
+Scoring one resume against many JDs then costs set operations and a dot product
+per pair instead of re-cleaning and re-scanning both texts each time.
+"""
+import hashlib
+
+import numpy as np
+
+from .preprocess import clean_text, extract_sections, DEFAULT_SKILLS
+from .skill_matcher import get_matcher
+from .embeddings import embed_documents_texts
+from . import metrics
+
+class Document:
+    __slots__ = ("name", "text", "lower", "digest", "_skills", "_sections", "_embedding")
+
+    def __init__(self, name, text, cleaned=False):
+        self.name = name
+        self.text = text if cleaned else clean_text(text)
+        self.lower = self.text.lower()
+        self.digest = hashlib.sha256(self.text.encode("utf-8")).hexdigest()
+        self._skills = {}        # id(vocab) -> (vocab, frozenset of canonical skills)
+        self._sections = None
+        self._embedding = None
+
+    def __repr__(self):
+        return f"Document({self.name!r}, {len(self.text)} chars, {self.digest[:12]})"
+
+    def __len__(self):
+        return len(self.text)
+
+    def skills(self, skill_vocab=None):
+        """
+        Canonical skills found in the text, cached per vocabulary object (or
+        SkillMatcher); the matcher is only looked up on a cache miss.
+        """
+        vocab = skill_vocab or DEFAULT_SKILLS
+        hit = self._skills.get(id(vocab))
+        if hit is not None and hit[0] is vocab:
+            return hit[1]
+        with metrics.timed("skills"):
+            found = frozenset(get_matcher(vocab).find_lower(self.lower))
+        self._skills[id(vocab)] = (vocab, found)
+        return found
+
+    @property
+    def sections(self):
+        if self._sections is None:
+            self._sections = extract_sections(self.text, cleaned=True)
+        return self._sections
+
+    @property
+    def embedding(self):
+        """
+        L2-normalized embedding (float32), computed on first access.
+        """
+        if self._embedding is None:
+            embed_documents([self])
+        return self._embedding
+
+def as_document(item, name=None):
+    """
+    Accept a Document, a (name, text) pair or a bare text.
+    """
+    if isinstance(item, Document):
+        return item
+    if isinstance(item, tuple):
+        return Document(item[0], item[1])
+    return Document(name, item)
+
+def embed_documents(docs, batch_size=64):
+    """
+    Fill in missing embeddings with one batched call (whole-text or chunked, per
+    embeddings.EMBED_MODE) and return the stacked (n, dim) matrix for docs.
+    """
+    docs = list(docs)
+    todo = [d for d in docs if d._embedding is None]
+    if todo:
+        emb = embed_documents_texts([d.text for d in todo], batch_size=batch_size)
+        for d, vec in zip(todo, emb):
+            d._embedding = vec
+    if not docs:
+        return np.zeros((0, 0), dtype=np.float32)
+    return np.stack([d._embedding for d in docs])
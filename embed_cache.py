@@ -0,0 +1,249 @@
+# utils/embed_cache.py
+import os
+import json
+import time
+import atexit
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .preprocess import clean_text
+from .quantize import check_dtype, quantize, dequantize
+
+DEFAULT_CACHE_DIR = os.getenv("RESUME_EMBED_CACHE_DIR", os.path.join(".cache", "embeddings"))
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESUME_EMBED_CACHE_MAX", "50000"))
+DEFAULT_DTYPE = os.getenv("RESUME_EMBED_CACHE_DTYPE", "float32")   # float32 | float16 | int8
+# the LRU index is rewritten whole, so it is saved at most this often (and at exit)
+DEFAULT_FLUSH_INTERVAL = float(os.getenv("RESUME_EMBED_CACHE_FLUSH_SECS", "30"))
+
+def cache_key(model_name, text):
+    """
+    Content address of an embedding: sha256 of (model name, cleaned text).
+    """
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(clean_text(text).encode("utf-8"))
+    return h.hexdigest()
+
+class EmbeddingCache:
+    """
+    Disk-backed LRU cache of embedding vectors.
+
+    Vectors live in a fixed-capacity memory-mapped `vectors.npy` (one row per slot),
+    and `index.json` maps each key to its slot in least- to most-recently-used order.
+    Only the rows that are looked up are read from disk. Once `max_entries` slots are
+    in use, the least-recently-used entries are evicted (1% of the capacity at a
+    time) and their slots reused.
+
+    Lookups and stores only touch memory and the mapped rows; `index.json` is
+    rewritten by maybe_flush() at most every `flush_interval` seconds, and by
+    flush()/close() (registered at exit). Entries stored after the last save are
+    lost if the process dies, which only costs re-encoding them. Evicted slots are
+    only reused after an index without their old keys has been saved, so a saved
+    index never maps a key to a slot that now holds another key's vector.
+
+    dtype "float16" or "int8" stores the vectors quantized (see quantize.py; int8
+    keeps a per-row scale in `scales.npy`) at half or a quarter of the size;
+    lookups return float32.
+    """
+
+    VECTORS_FILE = "vectors.npy"
+    SCALES_FILE = "scales.npy"
+    INDEX_FILE = "index.json"
+
+    def __init__(self, path=DEFAULT_CACHE_DIR, max_entries=DEFAULT_MAX_ENTRIES, dtype=DEFAULT_DTYPE,
+                 flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_entries = int(max_entries)
+        self.flush_interval = float(flush_interval)
+        self.dtype = check_dtype(dtype)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._slots = OrderedDict()   # key -> slot, oldest first
+        self._free = []
+        self._vectors = None
+        self._scales = None
+        self._dim = None
+        self._dirty = False
+        self._saved_at = time.monotonic()
+        self._load()
+        atexit.register(self.close)
+
+    # --- persistence ---
+    def _vectors_path(self):
+        return os.path.join(self.path, self.VECTORS_FILE)
+
+    def _scales_path(self):
+        return os.path.join(self.path, self.SCALES_FILE)
+
+    def _index_path(self):
+        return os.path.join(self.path, self.INDEX_FILE)
+
+    def _load(self):
+        idx_path = self._index_path()
+        if not (os.path.exists(idx_path) and os.path.exists(self._vectors_path())):
+            self._free = list(range(self.max_entries - 1, -1, -1))
+            return
+        try:
+            with open(idx_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            if int(meta.get("max_entries", -1)) != self.max_entries:
+                # capacity changed: start over rather than reshaping the store
+                raise ValueError("cache capacity changed")
+            if meta.get("dtype", "float32") != self.dtype:
+                raise ValueError("cache dtype changed")
+            self._dim = int(meta["dim"])
+            self._vectors = np.lib.format.open_memmap(self._vectors_path(), mode="r+")
+            if self.dtype == "int8":
+                self._scales = np.lib.format.open_memmap(self._scales_path(), mode="r+")
+            self._slots = OrderedDict((k, int(s)) for k, s in meta.get("entries", []))
+        except Exception:
+            self._slots = OrderedDict()
+            self._vectors = None
+            self._scales = None
+            self._dim = None
+        used = set(self._slots.values())
+        self._free = [s for s in range(self.max_entries - 1, -1, -1) if s not in used]
+
+    def _save_index(self):
+        os.makedirs(self.path, exist_ok=True)
+        meta = {
+            "dim": self._dim,
+            "max_entries": self.max_entries,
+            "dtype": self.dtype,
+            "entries": [[k, s] for k, s in self._slots.items()],
+        }
+        tmp = self._index_path() + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._index_path())
+        self._dirty = False
+        self._saved_at = time.monotonic()
+
+    def _ensure_vectors(self, dim):
+        if self._vectors is not None:
+            if dim == self._dim:
+                return
+            # a model with another dimension: the stored vectors are useless to it, start over
+            self._reset()
+        os.makedirs(self.path, exist_ok=True)
+        self._dim = dim
+        self._vectors = np.lib.format.open_memmap(
+            self._vectors_path(), mode="w+", dtype=self.dtype, shape=(self.max_entries, dim))
+        if self.dtype == "int8":
+            self._scales = np.lib.format.open_memmap(
+                self._scales_path(), mode="w+", dtype=np.float32, shape=(self.max_entries,))
+
+    def _flush_locked(self):
+        if self._vectors is not None:
+            self._vectors.flush()
+        if self._scales is not None:
+            self._scales.flush()
+        if self._dirty:
+            self._save_index()
+
+    def flush(self):
+        """
+        Persist vectors and LRU order if anything changed since the last flush.
+        """
+        with self._lock:
+            self._flush_locked()
+
+    def _evict(self, n):
+        # caller holds the lock; the index is saved before the slots are handed out again
+        freed = [self._slots.popitem(last=False)[1] for _ in range(min(n, len(self._slots)))]
+        self.evictions += len(freed)
+        self._dirty = True
+        self._flush_locked()
+        self._free.extend(freed)
+
+    def maybe_flush(self):
+        """
+        flush() if there are unsaved changes and the last save is flush_interval seconds old.
+        """
+        if self._dirty and time.monotonic() - self._saved_at >= self.flush_interval:
+            self.flush()
+
+    def close(self):
+        self.flush()
+
+    # --- lookups ---
+    def get_many(self, keys):
+        """
+        Return {key: vector} for the keys present in the cache; counts hits and misses.
+        """
+        found = {}
+        with self._lock:
+            for k in keys:
+                slot = self._slots.get(k)
+                if slot is None:
+                    self.misses += 1
+                    continue
+                self._slots.move_to_end(k)
+                found[k] = dequantize(self._vectors[slot], self._scales[slot] if self._scales is not None else None)
+                self.hits += 1
+            if found:
+                self._dirty = True
+        return found
+
+    def put_many(self, items):
+        """
+        Store {key: vector}. Evicts least-recently-used entries when full.
+        """
+        if not items:
+            return
+        with self._lock:
+            for i, (k, vec) in enumerate(items.items()):
+                vec = np.asarray(vec, dtype=np.float32).ravel()
+                self._ensure_vectors(vec.shape[0])
+                slot = self._slots.get(k)
+                if slot is None:
+                    if not self._free:
+                        self._evict(max(len(items) - i, self.max_entries // 100, 1))
+                    slot = self._free.pop()
+                self._slots[k] = slot
+                self._slots.move_to_end(k)
+                codes, scale = quantize(vec, self.dtype)
+                self._vectors[slot] = codes
+                if scale is not None:
+                    self._scales[slot] = scale
+            self._dirty = True
+
+    def __contains__(self, key):
+        return key in self._slots
+
+    def __len__(self):
+        return len(self._slots)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self._slots),
+            "max_entries": self.max_entries,
+            "evictions": self.evictions,
+            "dtype": self.dtype,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def _reset(self):
+        # caller holds the lock
+        self._slots = OrderedDict()
+        self._free = list(range(self.max_entries - 1, -1, -1))
+        self._vectors = None
+        self._scales = None
+        self._dim = None
+        self._dirty = False
+        for p in (self._vectors_path(), self._scales_path(), self._index_path()):
+            if os.path.exists(p):
+                os.remove(p)
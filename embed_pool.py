@@ -0,0 +1,125 @@
+# utils/embed_pool.py
+"""
+Sharded embedding over worker processes.
+
+ShardedEncoder has the SentenceTransformer encode() signature, so embeddings.py
+uses it like any other model (set_model, or RESUME_EMBED_WORKERS > 1). Each
+worker process loads the model once and pins torch to `threads` intra-op
+threads; a corpus is cut into contiguous shards, and every worker writes its
+rows straight into one shared-memory (n, dim) float32 array, so vectors come
+back in input order without being pickled.
+"""
+import os
+import atexit
+import threading
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from . import embeddings
+
+_WORKER_MODEL = None
+
+def set_torch_threads(threads):
+    """
+    Pin torch's intra-op thread count (no-op for 0 or without torch).
+    """
+    if not threads:
+        return
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(threads)
+
+def _init_worker(factory, name, threads):
+    global _WORKER_MODEL
+    if threads:
+        # before torch is imported, so OpenMP/MKL pools start at this size too
+        for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[var] = str(threads)
+    embeddings.EMBED_WORKERS = 0   # the worker's own model is never sharded again
+    _WORKER_MODEL = factory() if factory is not None else embeddings.load_model(name)
+    set_torch_threads(threads)
+
+def _dimension():
+    return int(_WORKER_MODEL.get_sentence_embedding_dimension())
+
+def _encode_shard(shm_name, shape, start, texts, batch_size):
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        emb = _WORKER_MODEL.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        out[start:start + len(texts)] = emb
+        del out
+    finally:
+        shm.close()
+    return len(texts)
+
+class ShardedEncoder:
+    """
+    workers processes x threads torch threads each. factory (a picklable
+    zero-argument callable returning a model) replaces load_model(name) in the
+    workers, e.g. for the benchmark stand-in. Workers start on first use and
+    stay up until close().
+    """
+
+    def __init__(self, workers=None, threads=0, name=None, factory=None, shards_per_worker=4):
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.threads = int(threads or 0)
+        self.model_name = name or embeddings.MODEL_NAME
+        self.factory = factory
+        self.shards_per_worker = shards_per_worker
+        self.max_seq_length = None
+        self._pool = None
+        self._dim = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.model_name
+
+    def _start(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: torch does not survive fork with its thread pools initialised
+                self._pool = ProcessPoolExecutor(self.workers, mp_context=mp.get_context("spawn"),
+                                                 initializer=_init_worker,
+                                                 initargs=(self.factory, self.model_name, self.threads))
+                self._dim = self._pool.submit(_dimension).result()
+                atexit.register(self.close)
+        return self._pool
+
+    def get_sentence_embedding_dimension(self):
+        self._start()
+        return self._dim
+
+    def encode(self, sentences, batch_size=32, convert_to_numpy=True, show_progress_bar=False, **kwargs):
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        pool = self._start()
+        if not texts:
+            return np.zeros((0, self._dim), dtype=np.float32)
+        # shards a few times more than workers so a slow shard does not hold the rest up,
+        # but never smaller than one model batch
+        size = max(batch_size, -(-len(texts) // (self.workers * self.shards_per_worker)))
+        shape = (len(texts), self._dim)
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(texts) * self._dim * 4))
+        try:
+            futures = [pool.submit(_encode_shard, shm.name, shape, s, texts[s:s + size], batch_size)
+                       for s in range(0, len(texts), size)]
+            for f in futures:
+                f.result()
+            out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf).copy()
+        finally:
+            shm.close()
+            shm.unlink()
+        return out[0] if single else out
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
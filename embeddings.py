@@ -1,29 +1,248 @@
 # utils/embeddings.py
-from sentence_transformers import SentenceTransformer
+import os
+import time
+import threading
 import numpy as np
 
+from .embed_cache import EmbeddingCache, cache_key
+from .preprocess import chunk_text
+from . import metrics
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# how documents are embedded for scoring (see embed_documents_texts):
+#   "full"     - the whole text in one encode (the model truncates long texts)
+#   "sections" - one chunk per resume section, long sections windowed
+#   "tokens"   - overlapping word windows over the whole text
+EMBED_MODE = os.getenv("RESUME_EMBED_MODE", "full")
+EMBED_POOLING = os.getenv("RESUME_EMBED_POOLING", "mean")   # mean | max | section
+CHUNK_WORDS = int(os.getenv("RESUME_CHUNK_WORDS", "180"))
+CHUNK_OVERLAP = int(os.getenv("RESUME_CHUNK_OVERLAP", "30"))
+SECTION_WEIGHTS = {"skills": 2.0, "experience": 1.5, "projects": 1.25, "summary": 1.0,
+                   "internship": 1.0, "certifications": 0.75, "achievements": 0.75, "education": 0.5}
+
+# RESUME_EMBED_WORKERS > 1 encodes through a ShardedEncoder (embed_pool.py) with that
+# many worker processes; RESUME_EMBED_THREADS pins torch threads per process (0 = torch default)
+EMBED_WORKERS = int(os.getenv("RESUME_EMBED_WORKERS", "0"))
+EMBED_THREADS = int(os.getenv("RESUME_EMBED_THREADS", "0"))
+
 _MODEL = None
+_CACHE = None
+_MODEL_LOCK = threading.Lock()
+_WARMUP = {"state": "idle", "error": None, "seconds": None, "thread": None}
 
-def load_model(name="all-MiniLM-L6-v2"):
+def load_model(name=MODEL_NAME):
     global _MODEL
     if _MODEL is None:
-        _MODEL = SentenceTransformer(name)
+        with _MODEL_LOCK:
+            if _MODEL is None and EMBED_WORKERS > 1:
+                from .embed_pool import ShardedEncoder
+                _MODEL = ShardedEncoder(EMBED_WORKERS, EMBED_THREADS, name)
+                _MODEL.get_sentence_embedding_dimension()   # start the workers (they load the model)
+            elif _MODEL is None:
+                # imported here: sentence_transformers pulls in torch, which takes seconds
+                from sentence_transformers import SentenceTransformer
+                _MODEL = SentenceTransformer(name)
+                if EMBED_THREADS:
+                    from .embed_pool import set_torch_threads
+                    set_torch_threads(EMBED_THREADS)
     return _MODEL
 
+def _warm_up():
+    t0 = time.perf_counter()
+    try:
+        load_model()
+        _WARMUP["state"] = "ready"
+    except Exception as e:
+        _WARMUP["state"] = "error"
+        _WARMUP["error"] = f"{type(e).__name__}: {e}"
+    _WARMUP["seconds"] = round(time.perf_counter() - t0, 2)
+
+def start_warmup():
+    """
+    Load the model in a background thread (once per process). Scoring calls that
+    arrive meanwhile wait on the same load instead of starting another one.
+    """
+    with _MODEL_LOCK:
+        if _WARMUP["thread"] is not None:
+            return
+        _WARMUP["state"] = "loading"
+        _WARMUP["thread"] = threading.Thread(target=_warm_up, name="embedding-warmup", daemon=True)
+    _WARMUP["thread"].start()
+
+def model_status():
+    """
+    {"state": "idle" | "loading" | "ready" | "error", "error": str | None, "seconds": load time}
+    """
+    state = "ready" if _MODEL is not None else _WARMUP["state"]
+    return {"state": state, "error": _WARMUP["error"], "seconds": _WARMUP["seconds"]}
+
+def set_model(model, name=None):
+    """
+    Use an already-constructed model (anything with a SentenceTransformer-style
+    encode()) instead of loading one. `name` keys its vectors in the cache.
+    """
+    global _MODEL, MODEL_NAME
+    _MODEL = model
+    if name:
+        MODEL_NAME = name
+
+def get_cache():
+    """
+    Shared on-disk embedding cache (created on first use).
+    Set RESUME_EMBED_CACHE=0 to disable caching.
+    """
+    global _CACHE
+    if _CACHE is None and os.getenv("RESUME_EMBED_CACHE", "1") != "0":
+        _CACHE = EmbeddingCache()
+    return _CACHE
+
+def set_cache(cache):
+    """
+    Replace the shared embedding cache (None disables it).
+    """
+    global _CACHE
+    _CACHE = cache
+
+def cache_stats():
+    cache = get_cache()
+    return cache.stats() if cache is not None else {}
+
 def embed_text(text):
-    model = load_model()
-    if isinstance(text, str):
-        text = [text]
-    emb = model.encode(text, convert_to_numpy=True)
-    if emb.ndim == 1:
-        return emb
-    return emb[0]
+    if not isinstance(text, str):
+        text = text[0]
+    return embed_texts([text], normalize=False)[0]
+
+def embed_texts(texts, batch_size=64, normalize=True):
+    """
+    Embed a list of texts with as few model.encode calls as possible.
+    Duplicate strings are encoded once. Returns an (n, dim) float32 array,
+    L2-normalized by default so that a matmul gives cosine similarities.
+    """
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    unique = {}
+    for t in texts:
+        unique.setdefault(t, len(unique))
+    emb = _encode_unique(list(unique), batch_size)
+    _flush_cache()
+    if normalize:
+        emb = normalize_rows(emb)
+    return emb[[unique[t] for t in texts]]
+
+def _flush_cache():
+    # once per embedding call, never per lookup; the cache throttles the actual write
+    cache = get_cache()
+    if cache is not None:
+        cache.maybe_flush()
+
+def _encode_unique(texts, batch_size):
+    """
+    Encode distinct texts, serving what we can from the cache.
+    The model is only loaded if at least one text is missing from the cache.
+    """
+    cache = get_cache()
+    if cache is None:
+        model = load_model()
+        with metrics.timed("encode"):
+            emb = model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        return np.asarray(emb, dtype=np.float32)
+
+    keys = [cache_key(MODEL_NAME, t) for t in texts]
+    cached = cache.get_many(keys)
+    todo = [i for i, k in enumerate(keys) if k not in cached]
+    fresh = {}
+    if todo:
+        model = load_model()
+        with metrics.timed("encode"):
+            emb = model.encode([texts[i] for i in todo], batch_size=batch_size, convert_to_numpy=True)
+        emb = np.asarray(emb, dtype=np.float32)
+        fresh = {keys[i]: emb[n] for n, i in enumerate(todo)}
+        cache.put_many(fresh)
+        if cached and len(next(iter(cached.values()))) != emb.shape[1]:
+            # hits were another model's vectors stored under this name; put_many reset the cache
+            return _encode_unique(texts, batch_size)
+    return np.stack([cached[k] if k in cached else fresh[k] for k in keys])
+
+def set_embedding_mode(mode="full", pooling="mean"):
+    """
+    Choose how documents are embedded for scoring ("full", "sections" or "tokens")
+    and how chunk vectors are pooled ("mean", "max" or "section").
+    """
+    global EMBED_MODE, EMBED_POOLING
+    if mode not in ("full", "sections", "tokens"):
+        raise ValueError(f"Unknown embedding mode: {mode}")
+    if pooling not in ("mean", "max", "section"):
+        raise ValueError(f"Unknown pooling: {pooling}")
+    EMBED_MODE, EMBED_POOLING = mode, pooling
+
+def embed_documents_texts(texts, batch_size=64):
+    """
+    Normalized document vectors under the configured EMBED_MODE/EMBED_POOLING.
+    """
+    if EMBED_MODE == "full":
+        return embed_texts(texts, batch_size=batch_size)
+    return embed_chunked(texts, EMBED_MODE, EMBED_POOLING, batch_size)
+
+def embed_chunked(texts, mode="sections", pooling="mean", batch_size=64, section_weights=None):
+    """
+    Embed long documents chunk by chunk and pool the chunk vectors into one
+    L2-normalized vector per document.
+
+    Chunks of all documents are encoded together in fixed slices of batch_size,
+    and pooled into running per-document sums/maxima, so peak memory is one
+    slice of chunk vectors plus the (n, dim) output however long the texts are.
+    Chunk vectors go through the embedding cache keyed by chunk text, so editing
+    one section of a document only re-embeds that section's chunks.
+    pooling: "mean", "max" or "section" (mean weighted by SECTION_WEIGHTS).
+    """
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    weights = section_weights or SECTION_WEIGHTS
+    owner, chunks, chunk_w = [], [], []
+    for i, text in enumerate(texts):
+        parts = chunk_text(text, mode, CHUNK_WORDS, CHUNK_OVERLAP) or [("text", "")]
+        for section, chunk in parts:
+            owner.append(i)
+            chunks.append(chunk)
+            chunk_w.append(weights.get(section, 1.0) if pooling == "section" else 1.0)
+    owner = np.asarray(owner)
+    chunk_w = np.asarray(chunk_w, dtype=np.float32)
+
+    pooled = None
+    for s in range(0, len(chunks), batch_size):
+        part = chunks[s:s + batch_size]
+        unique = {}
+        for c in part:
+            unique.setdefault(c, len(unique))
+        emb = normalize_rows(_encode_unique(list(unique), batch_size))[[unique[c] for c in part]]
+        if pooled is None:
+            fill = -np.inf if pooling == "max" else 0.0
+            pooled = np.full((len(texts), emb.shape[1]), fill, dtype=np.float32)
+        rows = owner[s:s + batch_size]
+        if pooling == "max":
+            np.maximum.at(pooled, rows, emb)
+        else:
+            np.add.at(pooled, rows, emb * chunk_w[s:s + batch_size, None])
+    _flush_cache()   # once for all slices
+    # mean pooling only needs the direction, so the sums are normalized as they are
+    return normalize_rows(pooled)
+
+def normalize_rows(mat):
+    """
+    L2-normalize each row of a 2D array (zero rows stay zero).
+    """
+    norms = np.linalg.norm(mat, axis=1, keepdims=True)
+    return mat / np.maximum(norms, 1e-10)
 
 def cosine_sim(a, b):
-    a = a.astype(float)
-    b = b.astype(float)
+    # float32 throughout: no float64 copies, and int8/float16 codes are widened before the dot
+    a = np.asarray(a, dtype=np.float32)
+    b = np.asarray(b, dtype=np.float32)
     num = float(np.dot(a, b))
-    den = (np.linalg.norm(a) * np.linalg.norm(b)) + 1e-10
+    den = float(np.linalg.norm(a) * np.linalg.norm(b)) + 1e-10
     sim = num/den
     sim = max(0.0, min(1.0, sim))
     return sim
@@ -1,18 +1,58 @@
 # utils/extract_text.py
 import os
+import mmap
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from io import BytesIO
 from typing import Union
 
-# try multiple libraries
-try:
-    import fitz   # PyMuPDF
-except Exception:
-    fitz = None
+from . import metrics
 
-try:
-    import docx
-except Exception:
-    docx = None
+# PyMuPDF and python-docx are imported on first use, not at import time
+_UNLOADED = object()
+_fitz = _UNLOADED
+_docx = _UNLOADED
+
+def _get_fitz():
+    global _fitz
+    if _fitz is _UNLOADED:
+        try:
+            import fitz   # PyMuPDF
+        except Exception:
+            fitz = None
+        _fitz = fitz
+    return _fitz
+
+def _get_docx():
+    global _docx
+    if _docx is _UNLOADED:
+        try:
+            import docx
+        except Exception:
+            docx = None
+        _docx = docx
+    return _docx
+
+# parsed (text, truncated) keyed by (sha256 of file bytes, extension); lives for the
+# process, so Streamlit reruns and repeated uploads of the same file skip parsing.
+TEXT_CACHE_MAX = 4096
+_TEXT_CACHE = OrderedDict()
+_TEXT_CACHE_LOCK = threading.Lock()
+
+# per-PDF limits for iter_pdf_pages (0 = no limit); a 200-page portfolio or a scanned
+# monster uploaded as a resume stops at these instead of stalling a worker. A cut is
+# reported ("pages", "chars" or "time": extract_many's "truncated" field, or
+# status["truncated"] for the single-file functions), and text cut by the time
+# budget is never cached, since where it stops depends on machine load.
+PDF_MAX_PAGES = int(os.getenv("RESUME_PDF_MAX_PAGES", "50"))
+PDF_MAX_CHARS = int(os.getenv("RESUME_PDF_MAX_CHARS", "200000"))
+PDF_TIME_BUDGET = float(os.getenv("RESUME_PDF_TIME_BUDGET", "10"))   # seconds
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
 
 def _read_bytes(obj):
     """
@@ -25,12 +65,15 @@ def _read_bytes(obj):
         # file-like from Streamlit upload: has .read()
         return obj.read()
 
-def extract_text(source: Union[str, bytes, object]) -> str:
+def extract_text(source: Union[str, bytes, object], status: dict = None) -> str:
     """
     Extract text from a file path or an uploaded file-like object (Streamlit).
     Supports: PDF, DOCX, TXT.
     Use: text = extract_text(uploaded_file)  OR extract_text("path/to/file.pdf")
+    status (a dict), if given, gets "truncated": None or the PDF limit that cut the text.
     """
+    if status is not None:
+        status["truncated"] = None
     name = None
     # detect filename if present
     try:
@@ -43,17 +86,26 @@ def extract_text(source: Union[str, bytes, object]) -> str:
         _, ext = os.path.splitext(str(source))
         ext = ext.lower()
         if ext == ".pdf":
-            return _extract_pdf_from_path(str(source))
+            return _extract_pdf_from_path(str(source), status)
         elif ext in [".docx", ".doc"]:
             return _extract_docx_from_path(str(source))
         elif ext in [".txt", ".md"]:
-            with open(source, "r", encoding="utf-8", errors="ignore") as f:
+            with metrics.timed("extract", "txt"), open(source, "r", encoding="utf-8", errors="ignore") as f:
                 return f.read()
         else:
             return ""
 
     # if source is uploaded file-like (Streamlit), use .read() bytes
     data = _read_bytes(source)
+    return extract_text_from_bytes(data, name, status)
+
+def extract_text_from_bytes(data: bytes, name: str = None, status: dict = None) -> str:
+    """
+    Extract text from raw file bytes. `name` (if given) is used for its extension;
+    otherwise the format is sniffed from the content. status as in extract_text.
+    """
+    if status is not None:
+        status["truncated"] = None
     # try to infer from name
     if name:
         _, ext = os.path.splitext(name)
@@ -61,37 +113,225 @@ def extract_text(source: Union[str, bytes, object]) -> str:
     else:
         ext = None
 
-    if ext == ".pdf" or (ext is None and fitz is not None and data[:4] == b"%PDF"):
-        return _extract_pdf_from_bytes(data)
+    if ext == ".pdf" or (ext is None and data[:4] == b"%PDF" and _get_fitz() is not None):
+        return _extract_pdf_from_bytes(data, status)
     if ext in [".docx", ".doc"] or (ext is None and data[:2] == b'PK'):
         return _extract_docx_from_bytes(data)
     # fallback as text
     try:
-        return data.decode("utf-8", errors="ignore")
+        with metrics.timed("extract", "txt"):
+            return data.decode("utf-8", errors="ignore")
     except Exception:
         return ""
 
-# PDF helpers
-def _extract_pdf_from_bytes(data: bytes) -> str:
-    if fitz is None:
-        raise ImportError("PyMuPDF (fitz) is required for PDF extraction. `pip install PyMuPDF`")
-    text = ""
-    doc = fitz.open(stream=data, filetype="pdf")
-    for page in doc:
-        text += page.get_text()
+def extract_text_cached(data: bytes, name: str = None, status: dict = None) -> str:
+    """
+    Same as extract_text_from_bytes, but memoized by the SHA-256 of the bytes
+    so identical content is parsed only once per process (text cut by the time
+    budget is not memoized). status as in extract_text, for cache hits too.
+    """
+    key = _cache_key(data, name)
+    hit = _cache_get(key)
+    if hit is not None:
+        text, truncated = hit
+    else:
+        info = {}
+        text = extract_text_from_bytes(data, name, info)
+        truncated = info["truncated"]
+        _cache_put(key, text, truncated)
+    if status is not None:
+        status["truncated"] = truncated
     return text
 
-def _extract_pdf_from_path(path: str) -> str:
+def _cache_key(data, name):
+    ext = os.path.splitext(name)[1].lower() if name else None
+    return (content_hash(data), ext)
+
+def _cache_get(key):
+    with _TEXT_CACHE_LOCK:
+        hit = _TEXT_CACHE.get(key)
+        if hit is not None:
+            _TEXT_CACHE.move_to_end(key)
+        return hit
+
+def _cache_put(key, text, truncated=None):
+    if truncated == "time":
+        return
+    with _TEXT_CACHE_LOCK:
+        _TEXT_CACHE[key] = (text, truncated)
+        while len(_TEXT_CACHE) > TEXT_CACHE_MAX:
+            _TEXT_CACHE.popitem(last=False)
+
+def _doc_type(name):
+    ext = os.path.splitext(str(name or ""))[1].lower()
+    return {".pdf": "pdf", ".docx": "docx", ".doc": "docx", ".txt": "txt", ".md": "txt"}.get(ext, "other")
+
+def _extract_one(source):
+    """
+    Worker for extract_many: returns (text, error, seconds, truncated) and never raises.
+    """
+    t0 = time.perf_counter()
+    status = {"truncated": None}
+    try:
+        if isinstance(source, tuple):
+            name, data = source
+            text, err = extract_text_from_bytes(data, name, status), None
+        else:
+            text, err = extract_text(source, status), None
+    except Exception as e:
+        text, err = "", f"{type(e).__name__}: {e}"
+    return text, err, time.perf_counter() - t0, status["truncated"]
+
+def _source_name(source):
+    if isinstance(source, tuple):
+        return source[0]
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.basename(str(source))
+    return getattr(source, "name", None)
+
+def extract_many(sources, workers=None):
+    """
+    Extract text from many files, spreading parsing across a process pool.
+    sources: file paths and/or (name, bytes) tuples (file-like objects are read first).
+    Returns a list of {"name", "text", "error", "truncated"} dicts in input order; a
+    file that fails to parse gets text "" and an error message instead of failing
+    the batch, and "truncated" names the PDF limit that cut a text short (or is None).
+    workers=1 runs serially in this process; None uses one worker per CPU.
+    In-memory sources go through the content-hash cache, so only unseen files are parsed.
+    """
+    items = []
+    for src in sources:
+        if not isinstance(src, (str, os.PathLike, tuple)):
+            src = (getattr(src, "name", None), _read_bytes(src))
+        items.append(src)
+
+    results = [None] * len(items)
+    keys = [_cache_key(src[1], src[0]) if isinstance(src, tuple) else None for src in items]
+    todo = []
+    dupes = {}  # index -> earlier index with identical bytes in this batch
+    first = {}
+    for i, key in enumerate(keys):
+        cached = _cache_get(key) if key is not None else None
+        if cached is not None:
+            results[i] = (cached[0], None, cached[1])
+        elif key is not None and key in first:
+            dupes[i] = first[key]
+        else:
+            if key is not None:
+                first[key] = i
+            todo.append(i)
+
+    workers = workers or os.cpu_count() or 1
+    workers = min(workers, len(todo))
+    outputs = None
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(todo) // (workers * 4))
+                outputs = list(pool.map(_extract_one, [items[i] for i in todo], chunksize=chunksize))
+        except Exception:
+            outputs = None  # pool unavailable or broken: fall back to serial
+    if outputs is None:
+        outputs = [_extract_one(items[i]) for i in todo]
+    elif metrics.enabled():
+        # timings recorded inside pool workers stay in those processes; record them here
+        for i, out in zip(todo, outputs):
+            metrics.observe("extract", out[2], _doc_type(_source_name(items[i])))
+
+    for i, (text, err, _, truncated) in zip(todo, outputs):
+        results[i] = (text, err, truncated)
+        if keys[i] is not None and err is None:
+            _cache_put(keys[i], text, truncated)
+    for i, j in dupes.items():
+        results[i] = results[j]
+
+    return [{"name": _source_name(src), "text": text, "error": err, "truncated": truncated}
+            for src, (text, err, truncated) in zip(items, results)]
+
+# PDF helpers
+def iter_pdf_pages(source, max_pages=None, max_chars=None, time_budget=None, status=None):
+    """
+    Yield a PDF's text page by page. source is a path (memory-mapped, not read
+    into memory) or the file bytes. Stops after max_pages pages, max_chars
+    characters (the last page is cut) or time_budget seconds, defaulting to
+    PDF_MAX_PAGES / PDF_MAX_CHARS / PDF_TIME_BUDGET; 0 means no limit.
+    status (a dict), if given, gets "truncated": None, or "pages" / "chars" /
+    "time" for the limit that stopped it before the end of the document.
+    The document is closed when the generator is exhausted or closed.
+    """
+    fitz = _get_fitz()
     if fitz is None:
         raise ImportError("PyMuPDF (fitz) is required for PDF extraction. `pip install PyMuPDF`")
-    text = ""
-    doc = fitz.open(path)
-    for page in doc:
-        text += page.get_text()
-    return text
+    limits = (PDF_MAX_PAGES if max_pages is None else max_pages,
+              PDF_MAX_CHARS if max_chars is None else max_chars,
+              PDF_TIME_BUDGET if time_budget is None else time_budget,
+              {} if status is None else status)
+    if not isinstance(source, (str, os.PathLike)):
+        yield from _pdf_pages(fitz, source, *limits)
+        return
+    with open(source, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            yield from _pdf_pages(fitz, b"", *limits)   # let PyMuPDF report the empty file
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield from _pdf_pages(fitz, view, *limits)
+            finally:
+                view.release()
+
+def _pdf_pages(fitz, data, max_pages, max_chars, time_budget, status):
+    deadline = time.perf_counter() + time_budget if time_budget else None
+    left = max_chars or None
+    status["truncated"] = None
+    with fitz.open(stream=data, filetype="pdf") as doc:
+        for n, page in enumerate(doc):
+            if max_pages and n >= max_pages:
+                status["truncated"] = "pages"
+                return
+            if deadline is not None and time.perf_counter() > deadline:
+                status["truncated"] = "time"
+                return
+            text = page.get_text()
+            if left is not None:
+                if len(text) > left:
+                    status["truncated"] = "chars"
+                text = text[:left]
+                left -= len(text)
+            yield text
+            if left == 0:
+                if status["truncated"] is None and n + 1 < len(doc):
+                    status["truncated"] = "chars"
+                return
+
+def iter_text(source, name=None, **limits):
+    """
+    Text of a path or (bytes, name) as a stream of pieces: page by page for PDFs
+    (limits as in iter_pdf_pages), the whole text at once for other formats.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        name = str(source)
+    ext = os.path.splitext(name)[1].lower() if name else None
+    is_pdf = ext == ".pdf" or (ext is None and isinstance(source, (bytes, bytearray)) and source[:4] == b"%PDF")
+    if is_pdf:
+        yield from iter_pdf_pages(source, **limits)
+    elif isinstance(source, (str, os.PathLike)):
+        yield extract_text(source, limits.get("status"))
+    else:
+        yield extract_text_from_bytes(source, name, limits.get("status"))
+
+@metrics.instrument("extract", "pdf")
+def _extract_pdf_from_bytes(data: bytes, status: dict = None) -> str:
+    return "".join(iter_pdf_pages(data, status=status))
+
+@metrics.instrument("extract", "pdf")
+def _extract_pdf_from_path(path: str, status: dict = None) -> str:
+    return "".join(iter_pdf_pages(path, status=status))
 
 # DOCX helpers
+@metrics.instrument("extract", "docx")
 def _extract_docx_from_bytes(data: bytes) -> str:
+    docx = _get_docx()
     if docx is None:
         raise ImportError("python-docx is required for DOCX extraction. `pip install python-docx`")
     bio = BytesIO(data)
@@ -99,7 +339,9 @@ def _extract_docx_from_bytes(data: bytes) -> str:
     paragraphs = [p.text for p in document.paragraphs]
     return "\n".join(paragraphs)
 
+@metrics.instrument("extract", "docx")
 def _extract_docx_from_path(path: str) -> str:
+    docx = _get_docx()
     if docx is None:
         raise ImportError("python-docx is required for DOCX extraction. `pip install python-docx`")
     document = docx.Document(path)
@@ -0,0 +1,206 @@
+# utils/jobs.py
+"""
+Background evaluation jobs.
+
+An EvaluationJob extracts and scores resumes chunk by chunk on a worker thread
+(extraction itself fans out to the process pool in extract_many). The job lives
+in a JobManager that outlives Streamlit script reruns, so widget interaction
+never restarts a run; the page polls progress(), shows partial() results and
+can cancel(). Finished jobs are kept by input key, so re-submitting the same
+resumes and JDs returns the cached result instead of recomputing it. With a
+ResultsStore, pairs scored by earlier runs are read back instead of recomputed
+and each finished job is saved as a run that can be reopened later. With dedup set,
+near-duplicate resumes are scored once per cluster.
+"""
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from .extract_text import extract_many, content_hash
+from .document import Document
+from .scorer import ScoreMatrix, score_matrix
+from .store import score_with_store
+from .dedup import NearDuplicateIndex
+
+def job_key(sources, jd_texts, jd_names, **settings):
+    """
+    Stable key for an evaluation input: resume names + content hashes, JDs and settings.
+    """
+    h = hashlib.sha256()
+    for name, data in sources:
+        h.update(f"r\0{name}\0{content_hash(data)}\0".encode("utf-8"))
+    for name, text in zip(jd_names, jd_texts):
+        h.update(f"j\0{name}\0".encode("utf-8"))
+        h.update(text.encode("utf-8"))
+    for k in sorted(settings):
+        h.update(f"s\0{k}={settings[k]!r}\0".encode("utf-8"))
+    return h.hexdigest()
+
+class EvaluationJob:
+    """
+    States: queued -> running -> done | cancelled | error.
+
+    top_k/min_hard enable score_matrix's cascade mode. min_hard prunes the same
+    pairs whatever the chunking; top_k is applied per chunk, which keeps a
+    superset of the global top_k.
+
+    dedup is a near-duplicate threshold (estimated Jaccard similarity, e.g. 0.8):
+    only the first resume of each cluster is scored, across chunks, and the
+    others copy its results (see dedup.NearDuplicateIndex).
+    """
+
+    def __init__(self, key, sources, jd_texts, jd_names, chunk_size=32, skill_vocab=None, fuzzy_threshold=80,
+                 top_k=None, min_hard=None, dedup=None, store=None):
+        self.key = key
+        self.sources = list(sources)
+        self.jd_texts = list(jd_texts)
+        self.jd_names = list(jd_names)
+        self.chunk_size = max(1, int(chunk_size))
+        self.skill_vocab = skill_vocab
+        self.fuzzy_threshold = fuzzy_threshold
+        self.top_k = top_k
+        self.min_hard = min_hard
+        self.dedup = dedup
+        self.duplicates = 0     # resumes that copied another resume's results
+        self.store = store
+        self.run_id = None      # id of the saved run in the store
+        self.reused = 0         # pairs read back from the store
+        self.computed = 0
+        self.state = "queued"
+        self.error = None
+        self.errors = []        # (filename, message) for unreadable resumes
+        self.truncated = []     # (filename, limit) for resumes only partly read (extract_text PDF limits)
+        self.done = 0
+        self.total = len(self.sources)
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._parts = []
+        self._jds = []
+        self._merged = None     # (n_parts, ScoreMatrix) cache for partial()
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def running(self):
+        return self.state in ("queued", "running")
+
+    def progress(self):
+        return self.done / self.total if self.total else 1.0
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def partial(self):
+        """
+        ScoreMatrix of the resumes scored so far (None before the first chunk).
+        """
+        with self._lock:
+            parts = list(self._parts)
+        if not parts:
+            return None
+        if self._merged is None or self._merged[0] != len(parts):
+            self._merged = (len(parts), parts[0] if len(parts) == 1 else ScoreMatrix.concat(parts))
+        return self._merged[1]
+
+    @property
+    def result(self):
+        return self.partial() if self.state == "done" else None
+
+    def run(self):
+        self.state = "running"
+        self.started = time.perf_counter()
+        try:
+            jds = self._jds = [Document(name, text) for name, text in zip(self.jd_names, self.jd_texts)]
+            index = NearDuplicateIndex(self.dedup) if self.dedup else None
+            for start in range(0, self.total, self.chunk_size):
+                if self._cancel.is_set():
+                    self.state = "cancelled"
+                    return
+                chunk = self.sources[start:start + self.chunk_size]
+                resumes = []
+                for e in extract_many(chunk):
+                    if e["error"]:
+                        self.errors.append((e["name"], e["error"]))
+                    else:
+                        resumes.append((e["name"], e["text"]))
+                        if e["truncated"]:
+                            self.truncated.append((e["name"], e["truncated"]))
+                if resumes and index is not None:
+                    part = index.score(resumes, self._score_chunk)
+                    self.duplicates += sum(d is not None for d in part.duplicate_of)
+                elif resumes:
+                    part = self._score_chunk(resumes)
+                if resumes:
+                    with self._lock:
+                        self._parts.append(part)
+                self.done = min(self.total, start + len(chunk))
+            if not self._parts:
+                self._parts.append(score_matrix([], jds, self.jd_names))
+            if self.store is not None:
+                self.run_id = self.store.save_run(self.partial(), [d.digest for d in jds],
+                                                  settings={"top_k": self.top_k, "min_hard": self.min_hard,
+                                                            "dedup": self.dedup})
+            self.state = "done"
+        except Exception as e:
+            self.error = str(e)
+            self.state = "error"
+        finally:
+            self.sources = []   # drop the uploaded bytes; results are in the parts
+            self.finished = time.perf_counter()
+
+    def _score_chunk(self, resumes):
+        if self.store is None:
+            return score_matrix(resumes, self._jds, self.jd_names, self.skill_vocab, self.fuzzy_threshold,
+                                self.top_k, self.min_hard)
+        part, counts = score_with_store(self.store, resumes, self._jds, self.jd_names, self.skill_vocab,
+                                        self.fuzzy_threshold, self.top_k, self.min_hard)
+        self.reused += counts["reused"]
+        self.computed += counts["computed"]
+        return part
+
+class JobManager:
+    """
+    Runs jobs on a small thread pool and remembers the last `keep` finished ones by key.
+    Jobs read and write `store` (a ResultsStore) when one is given.
+    """
+
+    def __init__(self, workers=1, keep=8, store=None):
+        self.keep = keep
+        self.store = store
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="evaluation")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, sources, jd_texts, jd_names, **settings):
+        """
+        Start (or reuse) the job for these inputs. A finished or still-running job
+        with the same key is returned as is; a cancelled or failed one is restarted.
+        """
+        sources = list(sources)
+        key = job_key(sources, jd_texts, jd_names, **settings)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and job.state in ("queued", "running", "done"):
+                self._jobs.move_to_end(key)
+                return job
+            job = EvaluationJob(key, sources, jd_texts, jd_names, store=self.store, **settings)
+            self._jobs[key] = job
+            self._prune()
+        self._pool.submit(job.run)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def _prune(self):
+        finished = [k for k, j in self._jobs.items() if not j.running]
+        for k in finished[:max(0, len(self._jobs) - self.keep)]:
+            del self._jobs[k]
@@ -0,0 +1,95 @@
+# utils/llm_cache.py
+import os
+import re
+import time
+import sqlite3
+import hashlib
+import threading
+
+DEFAULT_CACHE_PATH = os.getenv("RESUME_LLM_CACHE_PATH", os.path.join(".cache", "llm_responses.sqlite"))
+DEFAULT_TTL_SECONDS = int(os.getenv("RESUME_LLM_CACHE_TTL", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("RESUME_LLM_CACHE_MAX", "5000"))
+
+_WS = re.compile(r"\s+")
+
+def normalize_prompt(messages):
+    """
+    Role-tagged message contents with whitespace collapsed, so cosmetic
+    differences in the prompt do not miss the cache.
+    """
+    return "\n".join(f"{m['role']}: {_WS.sub(' ', m['content']).strip()}" for m in messages)
+
+def make_key(model, messages, temperature):
+    h = hashlib.sha256()
+    h.update(f"{model}\0{float(temperature):.4f}\0".encode("utf-8"))
+    h.update(normalize_prompt(messages).encode("utf-8"))
+    return h.hexdigest()
+
+class ResponseCache:
+    """
+    Persistent cache of LLM completions in a small SQLite file.
+    Entries older than `ttl_seconds` are ignored (and pruned); once more than
+    `max_entries` are stored the least-recently-used ones are dropped.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl_seconds=DEFAULT_TTL_SECONDS, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, model TEXT, temperature REAL, response TEXT,"
+            " created REAL, last_used REAL)")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None or (self.ttl_seconds and now - row[1] > self.ttl_seconds):
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key, response, model=None, temperature=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, model, temperature, response, created, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?)", (key, model, temperature, response, now, now))
+            if self.ttl_seconds:
+                self._conn.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+            if self.max_entries:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN (SELECT key FROM responses"
+                    " ORDER BY last_used DESC LIMIT -1 OFFSET ?)", (self.max_entries,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "entries": len(self),
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
@@ -2,26 +2,55 @@
 import os
 import json
 import re
+import time
+import random
+import asyncio
+import logging
+import threading
+
+from .preprocess import extract_sections, clean_text
+from .llm_cache import ResponseCache, make_key
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# prompt budgets (approximate tokens) for the resume and JD parts of the prompt
+RESUME_TOKEN_BUDGET = 1200
+JD_TOKEN_BUDGET = 600
+BUDGET_SECTIONS = ("skills", "experience", "projects")
 
 # Try to support both new (openai>=1.0) and old openai (<1.0) APIs.
-try:
-    # new-style client (openai>=1.0)
-    from openai import OpenAI as _OpenAIClient
-    _HAS_NEW_OPENAI = True
-except Exception:
-    _HAS_NEW_OPENAI = False
-
-try:
-    import openai as _old_openai  # for old versions (0.x)
-    _HAS_OLD_OPENAI = True
-except Exception:
-    _HAS_OLD_OPENAI = False
+# The openai package is imported on first use (see _load_openai), not at import time.
+_OpenAIClient = None
+_old_openai = None
+_HAS_NEW_OPENAI = False
+_HAS_OLD_OPENAI = False
+_OPENAI_LOADED = False
+
+def _load_openai():
+    global _OpenAIClient, _old_openai, _HAS_NEW_OPENAI, _HAS_OLD_OPENAI, _OPENAI_LOADED
+    if _OPENAI_LOADED:
+        return
+    try:
+        # new-style client (openai>=1.0)
+        from openai import OpenAI as _OpenAIClient
+        _HAS_NEW_OPENAI = True
+    except Exception:
+        _HAS_NEW_OPENAI = False
+
+    try:
+        import openai as _old_openai  # for old versions (0.x)
+        _HAS_OLD_OPENAI = True
+    except Exception:
+        _HAS_OLD_OPENAI = False
+    _OPENAI_LOADED = True
 
 def _ensure_api_key(key):
     """
     Ensure API key is available to whichever client we use.
     Returns the key (or None).
     """
+    _load_openai()
     k = key or os.getenv("OPENAI_API_KEY")
     if k:
         # new client reads from env var by default, set it to be safe
@@ -33,29 +62,36 @@ def _ensure_api_key(key):
                 pass
     return k
 
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+def _get_client():
+    """
+    One new-style OpenAI client per process, so calls share its HTTP connection pool.
+    """
+    global _CLIENT
+    key = os.getenv("OPENAI_API_KEY")
+    with _CLIENT_LOCK:
+        if _CLIENT is None or _CLIENT[0] != key:
+            _CLIENT = (key, _OpenAIClient())
+        return _CLIENT[1]
+
 def _chat_completion(messages, model="gpt-3.5-turbo", max_tokens=250, temperature=0.2):
     """
     Unified wrapper that calls ChatCompletion using the installed openai version.
     Returns the assistant text (string) or raises an Exception.
     """
+    _load_openai()
     if _HAS_NEW_OPENAI:
         # New-style usage: client.chat.completions.create(...)
-        client = _OpenAIClient()
+        client = _get_client()
         resp = client.chat.completions.create(
             model=model,
             messages=messages,
             max_tokens=max_tokens,
             temperature=temperature
         )
-        # The new client returns objects where content is at resp.choices[0].message.content
-        try:
-            return resp.choices[0].message.content
-        except Exception:
-            # fallback to raw dict-like access
-            try:
-                return resp["choices"][0]["message"]["content"]
-            except Exception as e:
-                raise RuntimeError(f"Unexpected response structure from new OpenAI client: {e}")
+        return _response_text(resp)
     elif _HAS_OLD_OPENAI:
         # Old-style usage: openai.ChatCompletion.create(...)
         resp = _old_openai.ChatCompletion.create(
@@ -67,28 +103,31 @@ def _chat_completion(messages, model="gpt-3.5-turbo", max_tokens=250, temperatur
         return resp["choices"][0]["message"]["content"]
     else:
         raise ImportError("OpenAI client not installed. Install with `pip install openai`")
-def generate_feedback(jd_text, resume_text, missing_skills=None, openai_api_key=None, model="gpt-3.5-turbo"):
-    """
-    Returns dict with keys: 'suggestions' (list) and 'verdict' (string).
-    If OpenAI is unavailable or returns a quota/auth error, this returns safe fallback suggestions.
-    Relies on helper functions _ensure_api_key(...) and _chat_completion(...) defined earlier in the file.
-    """
-    missing = missing_skills or []
-    key = _ensure_api_key(openai_api_key)
 
-    # If no API key or no client available, return fallback immediately
-    if not key or (not _HAS_NEW_OPENAI and not _HAS_OLD_OPENAI):
-        suggestions = []
-        for s in (missing[:3] if missing else []):
-            suggestions.append(f"Add a short project bullet demonstrating {s}.")
-        if not suggestions:
-            suggestions = [
-                "Make the skills section concise and relevant to the JD.",
-                "Add 1-2 short projects showing tools from the JD.",
-                "Mention quantifiable impact (e.g., improved X by Y%)."
-            ]
-        return {"suggestions": suggestions, "verdict": "LLM unavailable (fallback)"}
+def _response_text(resp):
+    # The new client returns objects where content is at resp.choices[0].message.content
+    try:
+        return resp.choices[0].message.content
+    except Exception:
+        # fallback to raw dict-like access
+        try:
+            return resp["choices"][0]["message"]["content"]
+        except Exception as e:
+            raise RuntimeError(f"Unexpected response structure from new OpenAI client: {e}")
 
+def _fallback_suggestions(missing):
+    suggestions = []
+    for s in (missing[:3] if missing else []):
+        suggestions.append(f"Add a short project bullet demonstrating {s}.")
+    if not suggestions:
+        suggestions = [
+            "Make the skills section concise and relevant to the JD.",
+            "Add 1-2 short projects showing tools from the JD.",
+            "Mention quantifiable impact (e.g., improved X by Y%)."
+        ]
+    return suggestions
+
+def _build_messages(jd_text, resume_text, missing):
     prompt = f"""
 You are a concise resume coach. Given the Job Description and Candidate Resume, provide:
 1) Up to 3 short, actionable suggestions (each <= 20 words) to make the resume more relevant.
@@ -105,96 +144,294 @@ Resume:
 
 Missing skills: {', '.join(missing) if missing else 'None'}
 """
-
-    messages = [
+    return [
         {"role": "system", "content": "You are a concise resume coach."},
         {"role": "user", "content": prompt}
     ]
 
+def _parse_feedback(text):
+    # Attempt to parse JSON from model output
     try:
-        text = _chat_completion(messages=messages, model=model, max_tokens=250, temperature=0.2)
-        # Attempt to parse JSON from model output
+        return json.loads(text)
+    except Exception:
+        # Try to extract a JSON substring in case model included explanation text
+        m = re.search(r"\{.*\}", text, re.DOTALL)
+        if m:
+            try:
+                return json.loads(m.group(0))
+            except Exception:
+                pass
+        # Fallback: split lines into suggestions and use last line as verdict
+        lines = [ln.strip("-• ") for ln in text.splitlines() if ln.strip()]
+        return {"suggestions": lines[:3], "verdict": lines[-1] if lines else "No verdict"}
+
+def _is_rate_limit(exc):
+    if getattr(exc, "status_code", None) == 429:
+        return True
+    err_str = str(exc).lower()
+    return "rate limit" in err_str or "429" in err_str
+
+def _error_feedback(exc, missing):
+    """
+    Map an LLM call failure to the fallback dict shown in the UI.
+    """
+    # Normalize error message for pattern matching
+    err_str = str(exc).lower()
+
+    # Quota / rate limit -> provide helpful fallback suggestions
+    if "quota" in err_str or "insufficient" in err_str or _is_rate_limit(exc):
+        return {"suggestions": _fallback_suggestions(missing),
+                "verdict": "LLM unavailable (quota/rate limit) - fallback suggestions"}
+
+    # Authentication / invalid key -> explain to user
+    if "invalid" in err_str or "incorrect api key" in err_str or "401" in err_str:
+        return {"suggestions": ["OpenAI API key invalid or revoked. Disable LLM or set a valid key."],
+                "verdict": "LLM auth error (invalid key)"}
+
+    # Other OpenAI-related errors -> return generic fallback and include small error note
+    return {"suggestions": [f"Could not fetch LLM suggestions: {str(exc)}",
+                            "Add a small project line showing relevant skill(s)."],
+            "verdict": "LLM error (fallback suggestions)"}
+
+# --- prompt budgeting ---
+def count_tokens(text, model="gpt-3.5-turbo"):
+    """
+    Token count via tiktoken when installed, else the ~4 chars/token estimate.
+    """
+    try:
+        import tiktoken
         try:
-            import json
-            return json.loads(text)
-        except Exception:
-            # Try to extract a JSON substring in case model included explanation text
-            import re
-            m = re.search(r"\{.*\}", text, re.DOTALL)
-            if m:
-                try:
-                    return json.loads(m.group(0))
-                except Exception:
-                    pass
-            # Fallback: split lines into suggestions and use last line as verdict
-            lines = [ln.strip("-• ") for ln in text.splitlines() if ln.strip()]
-            return {"suggestions": lines[:3], "verdict": lines[-1] if lines else "No verdict"}
-    except Exception as exc:
-        # Normalize error message for pattern matching
-        err_str = str(exc).lower()
-
-        # Quota / rate limit -> provide helpful fallback suggestions
-        if "quota" in err_str or "insufficient" in err_str or "rate limit" in err_str or "429" in err_str:
-            suggestions = []
-            for s in (missing[:3] if missing else []):
-                suggestions.append(f"Add a short project bullet demonstrating {s}.")
-            if not suggestions:
-                suggestions = [
-                    "Make the skills section concise and relevant to the JD.",
-                    "Add 1-2 short projects showing tools from the JD.",
-                    "Mention quantifiable impact (e.g., improved X by Y%)."
-                ]
-            return {"suggestions": suggestions, "verdict": "LLM unavailable (quota/rate limit) - fallback suggestions"}
-
-        # Authentication / invalid key -> explain to user
-        if "invalid" in err_str or "incorrect api key" in err_str or "401" in err_str:
-            return {"suggestions": ["OpenAI API key invalid or revoked. Disable LLM or set a valid key."],
-                    "verdict": "LLM auth error (invalid key)"}
-
-        # Other OpenAI-related errors -> return generic fallback and include small error note
-        return {"suggestions": [f"Could not fetch LLM suggestions: {str(exc)}",
-                                "Add a small project line showing relevant skill(s)."],
-                "verdict": "LLM error (fallback suggestions)"}
+            enc = tiktoken.encoding_for_model(model)
+        except KeyError:
+            enc = tiktoken.get_encoding("cl100k_base")
+        return len(enc.encode(text))
+    except ImportError:
+        return len(text) // 4
 
+def _truncate_to_tokens(text, max_tokens):
+    if count_tokens(text) <= max_tokens:
+        return text
+    # cut at the ~chars estimate, then back off to a line/word boundary
+    cut = text[:max(0, max_tokens) * 4]
+    while cut and count_tokens(cut) > max_tokens:
+        cut = cut[:int(len(cut) * 0.9)]
+    nl = cut.rfind("\n")
+    if nl > len(cut) // 2:
+        cut = cut[:nl]
+    return cut.rstrip()
 
-    prompt = f"""
-You are a concise resume coach. Given the Job Description and a Candidate Resume, provide:
-1) Up to 3 short, actionable suggestions (each <= 20 words) to make the resume more relevant.
-2) A one-line verdict ("Strong fit", "Partial fit", or "Weak fit").
+def budget_resume_text(resume_text, max_tokens=RESUME_TOKEN_BUDGET, sections=BUDGET_SECTIONS):
+    """
+    Shrink a resume to the parts that matter for feedback, within max_tokens.
+    The given sections (from extract_sections) are kept in order, each getting an
+    even share of what is left so a long section cannot crowd out the later ones.
+    If none are found, the start of the resume is used instead.
+    """
+    text = clean_text(resume_text)
+    if count_tokens(text) <= max_tokens:
+        return text
+    found = extract_sections(text)
+    present = [name for name in sections if found.get(name, "").strip()]
+    parts = []
+    remaining = max_tokens
+    for n, name in enumerate(present):
+        share = remaining // (len(present) - n)
+        block = _truncate_to_tokens(f"{name.title()}:\n{found[name].strip()}", share)
+        if block:
+            parts.append(block)
+            remaining -= count_tokens(block)
+    if not parts:
+        return _truncate_to_tokens(text, max_tokens)
+    return "\n\n".join(parts)
 
-Return JSON like:
-{{"suggestions":["...","..."], "verdict":"..."}}
+# --- response cache ---
+_RESPONSE_CACHE = None
 
-Job Description:
-{jd_text}
+def get_response_cache():
+    """
+    Shared LLM response cache (created on first use).
+    Set RESUME_LLM_CACHE=0 to disable caching.
+    """
+    global _RESPONSE_CACHE
+    if _RESPONSE_CACHE is None and os.getenv("RESUME_LLM_CACHE", "1") != "0":
+        _RESPONSE_CACHE = ResponseCache()
+    return _RESPONSE_CACHE
 
-Resume:
-{resume_text}
+def set_response_cache(cache):
+    global _RESPONSE_CACHE
+    _RESPONSE_CACHE = cache
 
-Missing skills: {', '.join(missing) if missing else 'None'}
-"""
+def _prepare_messages(jd_text, resume_text, missing, budget, model):
+    if budget:
+        resume_text = budget_resume_text(resume_text, budget)
+        jd_text = _truncate_to_tokens(clean_text(jd_text), JD_TOKEN_BUDGET)
+    messages = _build_messages(jd_text, resume_text, missing)
+    return messages, count_tokens("\n".join(m["content"] for m in messages), model)
 
-    messages = [
-        {"role": "system", "content": "You are a concise resume coach."},
-        {"role": "user", "content": prompt}
-    ]
+def _log_call(prompt_tokens, cache, hit):
+    if cache is None:
+        logger.info("LLM prompt tokens=%d (cache disabled)", prompt_tokens)
+        return
+    st = cache.stats()
+    logger.info("LLM prompt tokens=%d cache %s (hit rate %.0f%%, %d/%d)", prompt_tokens,
+                "hit" if hit else "miss", st["hit_rate"] * 100, st["hits"], st["hits"] + st["misses"])
 
+@metrics.instrument("llm")
+def generate_feedback(jd_text, resume_text, missing_skills=None, openai_api_key=None, model="gpt-3.5-turbo",
+                      prompt_budget=RESUME_TOKEN_BUDGET, use_cache=True):
+    """
+    Returns dict with keys: 'suggestions' (list) and 'verdict' (string).
+    If OpenAI is unavailable or returns a quota/auth error, this returns safe fallback suggestions.
+    The resume is cut down to its key sections within `prompt_budget` tokens (None sends it whole),
+    and successful completions are served from the response cache when `use_cache` is set.
+    """
+    missing = missing_skills or []
+    api_key = _ensure_api_key(openai_api_key)
+
+    # If no API key or no client available, return fallback immediately
+    if not api_key or (not _HAS_NEW_OPENAI and not _HAS_OLD_OPENAI):
+        return {"suggestions": _fallback_suggestions(missing), "verdict": "LLM unavailable (fallback)"}
+
+    messages, prompt_tokens = _prepare_messages(jd_text, resume_text, missing, prompt_budget, model)
+    cache = get_response_cache() if use_cache else None
+    cache_key = make_key(model, messages, 0.2)
+    cached = cache.get(cache_key) if cache is not None else None
+    _log_call(prompt_tokens, cache, cached is not None)
+    if cached is not None:
+        return _parse_feedback(cached)
     try:
         text = _chat_completion(messages=messages, model=model, max_tokens=250, temperature=0.2)
-        # Try to parse JSON from model output
-        try:
-            return json.loads(text)
-        except Exception:
-            # Try to extract JSON-like substring
-            m = re.search(r"\{.*\}", text, re.DOTALL)
-            if m:
+    except Exception as exc:
+        return _error_feedback(exc, missing)
+    if cache is not None:
+        cache.put(cache_key, text, model, 0.2)
+    return _parse_feedback(text)
+
+# --- bulk / concurrent generation ---
+class _RateLimiter:
+    """
+    Token-bucket limiter for requests-per-minute and tokens-per-minute budgets.
+    None disables a budget.
+    """
+
+    def __init__(self, rpm=None, tpm=None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self._req = float(rpm or 0)
+        self._tok = float(tpm or 0)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        elapsed = now - self._last
+        self._last = now
+        if self.rpm:
+            self._req = min(float(self.rpm), self._req + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tok = min(float(self.tpm), self._tok + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, tokens):
+        if self.tpm:
+            tokens = min(tokens, self.tpm)   # a single oversized request still goes through
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._req < 1:
+                    wait = max(wait, (1 - self._req) * 60.0 / self.rpm)
+                if self.tpm and self._tok < tokens:
+                    wait = max(wait, (tokens - self._tok) * 60.0 / self.tpm)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.rpm:
+                self._req -= 1
+            if self.tpm:
+                self._tok -= tokens
+
+def _retry_after(exc):
+    try:
+        return float(exc.response.headers.get("retry-after"))
+    except Exception:
+        return None
+
+async def agenerate_feedback_many(pairs, concurrency=8, rpm=None, tpm=None, openai_api_key=None,
+                                  model="gpt-3.5-turbo", base_url=None, max_retries=5, max_tokens=250,
+                                  prompt_budget=RESUME_TOKEN_BUDGET, use_cache=True):
+    """
+    Async version of generate_feedback_many (see there).
+    """
+    items = []
+    for p in pairs:
+        jd_text, resume_text = p[0], p[1]
+        missing = (p[2] if len(p) > 2 else None) or []
+        items.append((jd_text, resume_text, missing))
+
+    api_key = _ensure_api_key(openai_api_key)
+    if not api_key or (not _HAS_NEW_OPENAI and not _HAS_OLD_OPENAI):
+        return [{"suggestions": _fallback_suggestions(m), "verdict": "LLM unavailable (fallback)"}
+                for _, _, m in items]
+
+    limiter = _RateLimiter(rpm, tpm)
+    sem = asyncio.Semaphore(max(1, concurrency))
+    client = None
+    if _HAS_NEW_OPENAI:
+        from openai import AsyncOpenAI
+        # retries are handled below so they also go through the rate limiter
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+    async def _call(messages):
+        if client is not None:
+            resp = await client.chat.completions.create(
+                model=model, messages=messages, max_tokens=max_tokens, temperature=0.2)
+            return _response_text(resp)
+        return await asyncio.to_thread(_chat_completion, messages, model, max_tokens, 0.2)
+
+    cache = get_response_cache() if use_cache else None
+
+    async def _one(jd_text, resume_text, missing):
+        messages, prompt_tokens = _prepare_messages(jd_text, resume_text, missing, prompt_budget, model)
+        cache_key = make_key(model, messages, 0.2)
+        cached = cache.get(cache_key) if cache is not None else None
+        _log_call(prompt_tokens, cache, cached is not None)
+        if cached is not None:
+            return _parse_feedback(cached)
+        tokens = prompt_tokens + max_tokens
+        async with sem:
+            for attempt in range(max_retries + 1):
+                await limiter.acquire(tokens)
                 try:
-                    return json.loads(m.group(0))
-                except Exception:
-                    pass
-            # fallback: split lines into suggestions
-            lines = [ln.strip("-• ") for ln in text.splitlines() if ln.strip()]
-            return {"suggestions": lines[:3], "verdict": lines[-1] if lines else ""}
-    except Exception as e:
-        # Return a helpful error in the response object so UI can show it
-        return {"suggestions": [f"LLM error: {e}"], "verdict": ""}
+                    with metrics.timed("llm"):
+                        text = await _call(messages)
+                    if cache is not None:
+                        cache.put(cache_key, text, model, 0.2)
+                    return _parse_feedback(text)
+                except Exception as exc:
+                    if not _is_rate_limit(exc) or attempt == max_retries:
+                        return _error_feedback(exc, missing)
+                    delay = _retry_after(exc) or min(30.0, 0.5 * (2 ** attempt))
+                    await asyncio.sleep(delay * (1 + 0.25 * random.random()))
+
+    try:
+        return list(await asyncio.gather(*(_one(*it) for it in items)))
+    finally:
+        if client is not None:
+            await client.close()
+
+def generate_feedback_many(pairs, concurrency=8, rpm=None, tpm=None, openai_api_key=None,
+                           model="gpt-3.5-turbo", base_url=None, max_retries=5,
+                           prompt_budget=RESUME_TOKEN_BUDGET, use_cache=True):
+    """
+    Generate feedback for many candidates concurrently.
+    pairs: iterable of (jd_text, resume_text) or (jd_text, resume_text, missing_skills).
+    At most `concurrency` requests are in flight on one pooled client; rpm/tpm cap
+    requests and (estimated) tokens per minute, and 429s are retried with backoff.
+    Returns one generate_feedback-style dict per pair, in input order; failed calls
+    get the same fallback dicts as generate_feedback. base_url points the client at
+    another endpoint (e.g. a local stub server).
+    """
+    return asyncio.run(agenerate_feedback_many(
+        pairs, concurrency=concurrency, rpm=rpm, tpm=tpm, openai_api_key=openai_api_key,
+        model=model, base_url=base_url, max_retries=max_retries,
+        prompt_budget=prompt_budget, use_cache=use_cache))
@@ -0,0 +1,161 @@
+# utils/metrics.py
+"""
+Lightweight timing counters and histograms for the scoring pipeline.
+
+Off by default (set RESUME_METRICS=1 or call enable()). When off, the hooks
+cost one flag check per call.
+"""
+import os
+import json
+import time
+import threading
+import functools
+
+# histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_enabled = os.getenv("RESUME_METRICS", "0") == "1"
+_lock = threading.Lock()
+_series = {}   # (stage, doc_type) -> _Series
+
+class _Series:
+    __slots__ = ("count", "total", "max", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)   # last bucket is +Inf
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        for i, le in enumerate(BUCKETS):
+            if seconds <= le:
+                self.buckets[i] += 1
+                return
+        self.buckets[-1] += 1
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+def enabled():
+    return _enabled
+
+def reset():
+    with _lock:
+        _series.clear()
+
+def observe(stage, seconds, doc_type=""):
+    """
+    Record one timing (no-op while metrics are off).
+    """
+    if not _enabled:
+        return
+    key = (stage, doc_type or "")
+    with _lock:
+        s = _series.get(key)
+        if s is None:
+            s = _series[key] = _Series()
+        s.add(seconds)
+
+class _Timer:
+    __slots__ = ("stage", "doc_type", "t0")
+
+    def __init__(self, stage, doc_type):
+        self.stage = stage
+        self.doc_type = doc_type
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.stage, time.perf_counter() - self.t0, self.doc_type)
+        return False
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NOOP = _NoopTimer()
+
+def timed(stage, doc_type=""):
+    """
+    Context manager timing a block: `with timed("extract", "pdf"): ...`
+    """
+    if not _enabled:
+        return _NOOP
+    return _Timer(stage, doc_type)
+
+def instrument(stage, doc_type=""):
+    """
+    Decorator form of timed(). doc_type may be a string or a callable that
+    receives the call's arguments and returns one.
+    """
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                dt = doc_type(*args, **kwargs) if callable(doc_type) else doc_type
+                observe(stage, time.perf_counter() - t0, dt)
+        return wrapper
+    return deco
+
+# --- export ---
+def snapshot():
+    """
+    List of per-(stage, doc_type) dicts with count, total/mean/max seconds and buckets.
+    """
+    with _lock:
+        items = sorted(_series.items())
+        out = []
+        for (stage, doc_type), s in items:
+            out.append({
+                "stage": stage,
+                "doc_type": doc_type,
+                "count": s.count,
+                "total_s": round(s.total, 6),
+                "mean_ms": round(s.total / s.count * 1000.0, 3) if s.count else 0.0,
+                "max_ms": round(s.max * 1000.0, 3),
+                "buckets": dict(zip([str(b) for b in BUCKETS] + ["+Inf"], s.buckets)),
+            })
+        return out
+
+def to_json(indent=2):
+    return json.dumps({"enabled": _enabled, "series": snapshot()}, indent=indent)
+
+def _labels(stage, doc_type, **extra):
+    pairs = [("stage", stage)]
+    if doc_type:
+        pairs.append(("doc_type", doc_type))
+    pairs += list(extra.items())
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+def to_prometheus(prefix="resume_relevance"):
+    """
+    Prometheus text exposition format (one histogram per stage/doc_type).
+    """
+    name = f"{prefix}_stage_seconds"
+    lines = [f"# HELP {name} Time spent per pipeline stage.", f"# TYPE {name} histogram"]
+    for row in snapshot():
+        cumulative = 0
+        for le, n in row["buckets"].items():
+            cumulative += n
+            lines.append(f"{name}_bucket{_labels(row['stage'], row['doc_type'], le=le)} {cumulative}")
+        lines.append(f"{name}_sum{_labels(row['stage'], row['doc_type'])} {row['total_s']}")
+        lines.append(f"{name}_count{_labels(row['stage'], row['doc_type'])} {row['count']}")
+    return "\n".join(lines) + "\n"
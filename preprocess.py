@@ -1,6 +1,9 @@
 # utils/preprocess.py
 import re
 
+from .skill_matcher import get_matcher
+from . import metrics
+
 # Base skill vocabulary (extend as needed)
 DEFAULT_SKILLS = [
     "python","java","c++","sql","machine learning","deep learning","tensorflow",
@@ -9,6 +12,7 @@ DEFAULT_SKILLS = [
     "pandas","numpy","scikit-learn","tableau","power bi","spark"
 ]
 
+@metrics.instrument("clean")
 def clean_text(text: str) -> str:
     if not text:
         return ""
@@ -17,21 +21,54 @@ def clean_text(text: str) -> str:
     text = re.sub(r'[ \t]+', ' ', text)
     return text.strip()
 
+def _normalize_ws(text):
+    text = text.replace('\r', '\n')
+    text = re.sub(r'\n{2,}', '\n', text)
+    return re.sub(r'[ \t]+', ' ', text)
+
+def clean_text_stream(chunks):
+    """
+    clean_text over a stream of text pieces (e.g. PDF pages): yields cleaned
+    pieces whose concatenation equals clean_text("".join(chunks)). Trailing
+    whitespace of each piece is held back until the next one, so every
+    whitespace run is normalized whole.
+    """
+    carry, started = "", False
+    for chunk in chunks:
+        piece = carry + chunk
+        end = len(piece.rstrip())
+        head, carry = piece[:end], piece[end:]
+        if not head:
+            continue
+        head = _normalize_ws(head)
+        if not started:
+            head = head.lstrip()
+            started = bool(head)
+        if head:
+            yield head
+
+def extract_skills_from_stream(chunks, skill_vocab=None):
+    """
+    extract_skills_from_text over a stream of text pieces, without joining them.
+    """
+    matcher = get_matcher(skill_vocab or DEFAULT_SKILLS)
+    return sorted(matcher.find_stream(piece.lower() for piece in clean_text_stream(chunks)))
+
+@metrics.instrument("skills")
 def extract_skills_from_text(text: str, skill_vocab=None):
     """
-    Very simple skill detector: checks if any term from vocab appears in text.
+    Skill detector: finds every vocab term (or alias) that appears in the text as a
+    whole word. skill_vocab is a list of skills or a dict {skill: [aliases]};
+    results are canonical lowercase skill names.
     """
     text_l = clean_text(text).lower()
-    skills = set()
-    skill_vocab = skill_vocab or DEFAULT_SKILLS
-    for s in skill_vocab:
-        if s.lower() in text_l:
-            skills.add(s.lower())
-    return sorted(list(skills))
+    matcher = get_matcher(skill_vocab or DEFAULT_SKILLS)
+    return sorted(matcher.find_lower(text_l))
 
 # basic sections extractor (heuristic)
-def extract_sections(text: str):
-    text = clean_text(text)
+def extract_sections(text: str, cleaned=False):
+    if not cleaned:
+        text = clean_text(text)
     lines = [l.strip() for l in text.splitlines() if l.strip()]
     sections = {}
     current = "summary"
@@ -50,3 +87,30 @@ def extract_sections(text: str):
         else:
             sections.setdefault(current, []).append(line)
     return {k: "\n".join(v) for k,v in sections.items()}
+
+def _windows(words, size, overlap):
+    step = max(1, size - overlap)
+    for start in range(0, max(1, len(words) - overlap), step):
+        yield " ".join(words[start:start + size])
+
+def chunk_text(text: str, mode="sections", max_words=180, overlap=30, cleaned=False):
+    """
+    Split a document into embedding-sized chunks: [(section, chunk_text)].
+    mode="sections" chunks on extract_sections() (long sections are windowed
+    further); mode="tokens" uses overlapping word windows over the whole text.
+    max_words approximates the model's token limit (~256 word pieces).
+    """
+    if not cleaned:
+        text = clean_text(text)
+    if mode == "sections":
+        parts = extract_sections(text, cleaned=True).items()
+    elif mode == "tokens":
+        parts = [("text", text)]
+    else:
+        raise ValueError(f"Unknown chunking mode: {mode}")
+    chunks = []
+    for name, body in parts:
+        words = body.split()
+        if words:
+            chunks.extend((name, w) for w in _windows(words, max_words, overlap))
+    return chunks
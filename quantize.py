@@ -0,0 +1,73 @@
+# utils/quantize.py
+"""
+Compact storage for L2-normalized embedding rows.
+
+  "float32" - as is (4 bytes per dimension)
+  "float16" - half precision (2 bytes; ~1e-3 relative error)
+  "int8"    - per-row scale = max |x| / 127, codes = round(x / scale) (1 byte + 4 per row)
+
+Similarities are computed on the stored arrays by dot(), which walks the rows
+in blocks: each block is widened to float32 in a small scratch buffer, multiplied
+by the (float32) queries and rescaled, so the full matrix is never expanded.
+"""
+import numpy as np
+
+DTYPES = ("float32", "float16", "int8")
+
+def check_dtype(dtype):
+    """
+    Normalise a storage dtype (name or numpy dtype) to one of DTYPES.
+    """
+    try:
+        name = np.dtype(dtype).name
+    except TypeError:
+        name = str(dtype)
+    if name not in DTYPES:
+        raise ValueError(f"Unsupported embedding storage dtype: {dtype}")
+    return name
+
+def quantize(mat, dtype="int8"):
+    """
+    (codes, scales) for an (n, dim) float array; scales is None unless dtype is int8.
+    """
+    dtype = check_dtype(dtype)
+    mat = np.asarray(mat, dtype=np.float32)
+    if dtype != "int8":
+        return mat.astype(dtype, copy=False), None
+    scales = np.abs(mat).max(axis=-1) / 127.0
+    safe = np.where(scales > 0, scales, 1.0).astype(np.float32)
+    codes = np.rint(mat / safe[..., None]).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+def dequantize(codes, scales=None, out=None):
+    """
+    float32 rows back from (codes, scales); writes into `out` when given.
+    """
+    out = np.empty(codes.shape, dtype=np.float32) if out is None else out
+    out[...] = codes
+    if scales is not None:
+        out *= np.asarray(scales, dtype=np.float32)[..., None]
+    return out
+
+def dot(codes, scales, queries, block=8192):
+    """
+    codes (n, dim) x queries (dim,) or (m, dim) -> (n,) or (n, m) float32
+    similarities, for any storage dtype, `block` rows at a time.
+    """
+    q = np.asarray(queries, dtype=np.float32)
+    n = codes.shape[0]
+    if codes.dtype == np.float32:
+        return codes @ q.T
+    out = np.empty((n,) + q.shape[:-1], dtype=np.float32)
+    buf = np.empty((min(block, n), codes.shape[1]), dtype=np.float32)
+    for s in range(0, n, block):
+        e = min(s + block, n)
+        rows = buf[:e - s]
+        rows[...] = codes[s:e]
+        np.matmul(rows, q.T, out=out[s:e])
+        if scales is not None:
+            out[s:e] *= (scales[s:e] if q.ndim == 1 else scales[s:e, None])
+    return out
+
+def nbytes(codes, scales=None):
+    return codes.nbytes + (scales.nbytes if scales is not None else 0)
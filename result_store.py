@@ -0,0 +1,152 @@
+# utils/result_store.py
+"""
+Compact storage for evaluation results.
+
+SkillSets keeps one variable-length list of skill ids per row in CSR form
+(indptr/indices) instead of Python lists of strings; TextStore keeps each
+cleaned text once per content hash, zlib-compressed, and only inflates it when
+someone asks for it (e.g. the inspect view).
+"""
+import zlib
+
+import numpy as np
+
+class SkillSets:
+    """
+    Skill-id lists per row: row r holds names[indices[indptr[r]:indptr[r + 1]]].
+    """
+    __slots__ = ("names", "indptr", "indices", "_csr")
+
+    def __init__(self, names, indptr, indices):
+        self.names = list(names)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self._csr = None
+
+    @classmethod
+    def from_pairs(cls, n_rows, rows, ids, names):
+        """
+        Build from parallel (row, skill id) arrays; ids within a row end up ascending.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        ids = np.asarray(ids, dtype=np.int32)
+        order = np.lexsort((ids, rows))
+        indptr = np.zeros(n_rows + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n_rows), out=indptr[1:])
+        return cls(names, indptr, ids[order])
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Stack row blocks; skill ids are remapped if the blocks use different names.
+        """
+        parts = list(parts)
+        names = parts[0].names if parts else []
+        if any(p.names != names for p in parts):
+            names = sorted(set().union(*(p.names for p in parts)))
+        pos = {s: k for k, s in enumerate(names)}
+        indptr, indices, offset = [np.zeros(1, dtype=np.int64)], [], 0
+        for p in parts:
+            indptr.append(p.indptr[1:] + offset)
+            offset += int(p.indptr[-1])
+            if p.names == names:
+                indices.append(p.indices)
+            else:
+                remap = np.array([pos[s] for s in p.names], dtype=np.int32)
+                indices.append(remap[p.indices])
+        return cls(names, np.concatenate(indptr),
+                   np.concatenate(indices) if indices else np.zeros(0, dtype=np.int32))
+
+    def take(self, rows):
+        """
+        New SkillSets with the given rows, in that order.
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.indptr[rows + 1] - self.indptr[rows]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=indptr[1:])
+        src = np.repeat(self.indptr[rows] - indptr[:-1], lengths) + np.arange(indptr[-1])
+        return SkillSets(self.names, indptr, self.indices[src])
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def nbytes(self):
+        return self.indptr.nbytes + self.indices.nbytes
+
+    def ids(self, row):
+        return self.indices[self.indptr[row]:self.indptr[row + 1]]
+
+    def lengths(self):
+        return np.diff(self.indptr)
+
+    def skills(self, row):
+        return [self.names[k] for k in self.ids(row)]
+
+    def joined(self, rows, sep=", "):
+        """
+        Comma-joined skill names for the given rows (object array, for display/CSV).
+        """
+        return np.array([sep.join(self.names[k] for k in self.ids(r)) for r in rows], dtype=object)
+
+    def to_csr(self):
+        """
+        Boolean scipy.sparse CSR matrix (rows x skills) sharing indptr/indices.
+        """
+        if self._csr is None:
+            from scipy import sparse
+            data = np.ones(len(self.indices), dtype=bool)
+            self._csr = sparse.csr_matrix((data, self.indices, self.indptr),
+                                          shape=(len(self), len(self.names)), copy=False)
+        return self._csr
+
+    def counts(self, rows=None):
+        """
+        How many of the given rows (default: all) contain each skill id.
+        """
+        if rows is None:
+            sel = self.indices
+        else:
+            mask = np.zeros(len(self), dtype=bool)
+            mask[np.asarray(rows, dtype=np.int64)] = True
+            sel = self.indices[np.repeat(mask, self.lengths())]
+        return np.bincount(sel, minlength=len(self.names))
+
+class TextStore:
+    """
+    Texts stored once per content hash, compressed; get() inflates on demand.
+    """
+
+    def __init__(self, level=6):
+        self.level = level
+        self._blobs = {}
+
+    def put(self, digest, text):
+        if digest not in self._blobs:
+            self._blobs[digest] = zlib.compress(text.encode("utf-8"), self.level)
+        return digest
+
+    def put_compressed(self, digest, blob):
+        self._blobs.setdefault(digest, blob)
+        return digest
+
+    def compressed(self, digest):
+        return self._blobs[digest]
+
+    def update(self, other):
+        for digest, blob in other._blobs.items():
+            self._blobs.setdefault(digest, blob)
+
+    def get(self, digest):
+        return zlib.decompress(self._blobs[digest]).decode("utf-8")
+
+    def __contains__(self, digest):
+        return digest in self._blobs
+
+    def __len__(self):
+        return len(self._blobs)
+
+    @property
+    def nbytes(self):
+        return sum(len(b) for b in self._blobs.values())
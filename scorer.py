@@ -1,41 +1,89 @@
 # utils/scorer.py
-from .preprocess import extract_skills_from_text, clean_text
-from .embeddings import embed_text, cosine_sim
-from rapidfuzz import fuzz
-
-def hard_match_score(jd_text, resume_text, skill_vocab=None):
-    jd_skills = extract_skills_from_text(jd_text, skill_vocab)
-    resume_skills = extract_skills_from_text(resume_text, skill_vocab)
-    matched = []
-    missing = []
-    for s in jd_skills:
-        if s in resume_skills:
-            matched.append(s)
-        else:
-            # fuzzy fallback using resume text tokens
-            found = False
-            for r in resume_skills:
-                if fuzz.token_sort_ratio(s, r) >= 80:
-                    found = True
-                    break
-            if found:
-                matched.append(s)
-            else:
-                missing.append(s)
+from .document import Document, as_document, embed_documents
+from .result_store import SkillSets, TextStore
+import numpy as np
+from . import metrics
+
+def hard_match_score(jd_text, resume_text, skill_vocab=None, threshold=80):
+    return hard_match_batch(jd_text, [resume_text], skill_vocab, threshold)[0]
+
+def hard_match_batch(jd_text, resume_texts, skill_vocab=None, threshold=80, workers=-1):
+    """
+    Hard-match one JD against many resumes (texts or Documents).
+    Returns a list of (score, matched, missing), one per resume.
+    """
+    jd_skills = sorted(as_document(jd_text).skills(skill_vocab))
+    resume_skills = [sorted(as_document(t).skills(skill_vocab)) for t in resume_texts]
+    return match_skill_lists(jd_skills, resume_skills, threshold, workers)
+
+@metrics.instrument("hard_match")
+def match_skill_lists(jd_skills, resume_skills, threshold=80, workers=-1):
+    """
+    A JD skill counts as matched for a resume if the resume has it, or has a skill
+    whose fuzz.token_sort_ratio with it is >= threshold. All fuzzy comparisons for
+    the batch come from one rapidfuzz cdist call over the distinct resume skills.
+    """
     if len(jd_skills) == 0:
-        return 0.0, matched, missing
-    score = (len(matched) / len(jd_skills)) * 100.0
-    return round(score,2), matched, missing
+        return [(0.0, [], []) for _ in resume_skills]
+
+    out = []
+    for row in _skill_hits(jd_skills, resume_skills, threshold, workers):
+        matched = [s for s, h in zip(jd_skills, row) if h]
+        missing = [s for s, h in zip(jd_skills, row) if not h]
+        score = (len(matched) / len(jd_skills)) * 100.0
+        out.append((round(score, 2), matched, missing))
+    return out
 
+def _skill_hits(jd_skills, resume_skills, threshold=80, workers=-1):
+    """
+    Boolean (n_resumes, n_jd_skills) array: which JD skills each resume covers.
+    """
+    universe = sorted(set().union(*resume_skills)) if resume_skills else []
+    col = {s: i for i, s in enumerate(universe)}
+    has = np.zeros((len(resume_skills), len(universe)), dtype=np.float32)
+    for i, skills in enumerate(resume_skills):
+        has[i, [col[s] for s in skills]] = 1.0
+
+    if universe:
+        from rapidfuzz import fuzz, process
+        with metrics.timed("fuzzy"):
+            close = process.cdist(jd_skills, universe, scorer=fuzz.token_sort_ratio,
+                                  score_cutoff=threshold, workers=workers) >= threshold
+        for j, s in enumerate(jd_skills):
+            if s in col:
+                close[j, col[s]] = True  # exact match always counts
+        hit = (has @ close.T.astype(np.float32)) > 0
+    else:
+        hit = np.zeros((len(resume_skills), len(jd_skills)), dtype=bool)
+    return hit
+
+@metrics.instrument("semantic")
 def semantic_score(jd_text, resume_text):
+    """
+    Cosine similarity x 100 for one pair (texts or Documents; a Document keeps
+    its embedding, so scoring it against further JDs is a dot product).
+    """
     try:
-        jd_emb = embed_text(jd_text)
-        res_emb = embed_text(resume_text)
-        sim = cosine_sim(jd_emb, res_emb)
-        return round(sim * 100.0, 2)
+        sim = float(np.dot(as_document(jd_text).embedding, as_document(resume_text).embedding))
+        return round(max(0.0, min(1.0, sim)) * 100.0, 2)
     except Exception:
         return 0.0
 
+@metrics.instrument("semantic_batch")
+def semantic_matrix(jd_texts, resume_texts):
+    """
+    Semantic scores for every (resume, JD) pair as a (n_resumes, n_jds) array.
+    Inputs are texts or Documents; each is embedded once (Documents keep their
+    embedding) and similarities come from one matmul.
+    """
+    try:
+        res_emb = embed_documents([as_document(t) for t in resume_texts])
+        jd_emb = embed_documents([as_document(t) for t in jd_texts])
+        sims = (res_emb @ jd_emb.T).astype(np.float64)
+    except Exception:
+        return np.zeros((len(resume_texts), len(jd_texts)))
+    return np.round(np.clip(sims, 0.0, 1.0) * 100.0, 2)
+
 def final_score(hard_score, semantic_score, hard_weight=0.5, semantic_weight=0.5):
     fs = hard_score * hard_weight + semantic_score * semantic_weight
     return round(fs, 2)
@@ -48,15 +96,17 @@ def verdict_from_score(score):
     else:
         return "Low"
 
-def evaluate_resume(filename, resume_text, jd_text, hard_weight=0.5, semantic_weight=0.5, skill_vocab=None):
+def evaluate_resume(filename, resume_text, jd_text, hard_weight=0.5, semantic_weight=0.5, skill_vocab=None, fuzzy_threshold=80):
     """
     Returns a dict with all fields used by the app.
+    resume_text and jd_text may be Documents, so a resume compared with several
+    JDs is only cleaned, skill-scanned and embedded once.
     """
-    resume_text = clean_text(resume_text)
-    jd_text = clean_text(jd_text)
+    resume = as_document(resume_text)
+    jd = as_document(jd_text)
 
-    hard, matched, missing = hard_match_score(jd_text, resume_text, skill_vocab)
-    sem = semantic_score(jd_text, resume_text)
+    hard, matched, missing = hard_match_score(jd, resume, skill_vocab, fuzzy_threshold)
+    sem = semantic_score(jd, resume)
     final = final_score(hard, sem, hard_weight, semantic_weight)
     verdict = verdict_from_score(final)
 
@@ -68,5 +118,270 @@ def evaluate_resume(filename, resume_text, jd_text, hard_weight=0.5, semantic_we
         "verdict": verdict,
         "matched_skills": ", ".join(matched),
         "missing_skills": ", ".join(missing),
-        "resume_text": resume_text
+        "resume_text": resume.text
     }
+
+
+VERDICT_THRESHOLDS = ((75, "High"), (50, "Medium"))
+
+def verdicts_from_scores(scores):
+    """
+    Vectorized verdict_from_score over an array of final scores.
+    """
+    scores = np.asarray(scores)
+    return np.select([scores >= t for t, _ in VERDICT_THRESHOLDS],
+                     [v for _, v in VERDICT_THRESHOLDS], default="Low")
+
+class ScoreMatrix:
+    """
+    Component scores for every (resume, JD) pair of an evaluation, stored by column.
+
+    hard and semantic are (n_resumes, n_jds) float arrays. matched/missing are
+    SkillSets over pair rows (pair = resume * n_jds + jd) holding skill ids into
+    `skills`. Resume texts live once per content hash in a compressed TextStore
+    and are only inflated by text()/document(). Final scores, best-JD choice and
+    verdicts depend only on the arrays and the weights, so re-weighting never
+    re-scores anything.
+
+    `scored` marks the pairs that got a semantic score; pairs pruned by a cascade
+    run (see score_matrix) have semantic 0 and rank on their hard score alone.
+    `duplicate_of` names, per resume, the near-duplicate whose scores it shares
+    (None for resumes scored in their own right; see dedup.py), and `scored_as`
+    the digest of the document whose scores each row holds (its own digest
+    unless it is a near-duplicate).
+    """
+
+    def __init__(self, filenames, jd_names, hard, semantic, matched, missing, digests, texts, scored=None,
+                 duplicate_of=None, scored_as=None):
+        self.filenames = np.array(filenames, dtype=object)
+        self.jd_names = np.array(jd_names, dtype=object)
+        self.hard = np.asarray(hard, dtype=np.float64).reshape(len(self.filenames), len(self.jd_names))
+        self.semantic = np.asarray(semantic, dtype=np.float64).reshape(self.hard.shape)
+        self.matched = matched
+        self.missing = missing
+        self.digests = list(digests)
+        self.texts = texts
+        self.scored = (np.ones(self.hard.shape, dtype=bool) if scored is None
+                       else np.asarray(scored, dtype=bool).reshape(self.hard.shape))
+        self.duplicate_of = (np.full(len(self.filenames), None, dtype=object) if duplicate_of is None
+                             else np.array(duplicate_of, dtype=object))
+        self.scored_as = list(self.digests) if scored_as is None else list(scored_as)
+
+    @classmethod
+    def concat(cls, parts):
+        """
+        Stack ScoreMatrices scored against the same JDs (e.g. chunks of one run).
+        """
+        parts = list(parts)
+        texts = TextStore()
+        for p in parts:
+            texts.update(p.texts)
+        return cls([f for p in parts for f in p.filenames], parts[0].jd_names,
+                   np.concatenate([p.hard for p in parts]), np.concatenate([p.semantic for p in parts]),
+                   SkillSets.concat(p.matched for p in parts), SkillSets.concat(p.missing for p in parts),
+                   [d for p in parts for d in p.digests], texts, np.concatenate([p.scored for p in parts]),
+                   np.concatenate([p.duplicate_of for p in parts]), [d for p in parts for d in p.scored_as])
+
+    def take(self, rows):
+        """
+        ScoreMatrix of the given resume rows, in that order (texts are shared).
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        m = self.shape[1]
+        pairs = (rows[:, None] * m + np.arange(m)).ravel()
+        return ScoreMatrix(self.filenames[rows], self.jd_names, self.hard[rows], self.semantic[rows],
+                           self.matched.take(pairs), self.missing.take(pairs),
+                           [self.digests[r] for r in rows], self.texts, self.scored[rows], self.duplicate_of[rows],
+                           [self.scored_as[r] for r in rows])
+
+    @property
+    def shape(self):
+        return self.hard.shape
+
+    @property
+    def pruned(self):
+        """
+        Number of (resume, JD) pairs that were not semantically scored.
+        """
+        return int(self.scored.size - np.count_nonzero(self.scored))
+
+    @property
+    def skills(self):
+        return self.matched.names
+
+    def pair(self, resume, jd):
+        return resume * self.shape[1] + jd
+
+    def matched_skills(self, resume, jd):
+        return self.matched.skills(self.pair(resume, jd))
+
+    def missing_skills(self, resume, jd):
+        return self.missing.skills(self.pair(resume, jd))
+
+    def text(self, resume):
+        return self.texts.get(self.digests[resume])
+
+    def document(self, resume):
+        """
+        Rebuild the resume's Document from the stored text (for sections etc.).
+        """
+        return Document(self.filenames[resume], self.text(resume), cleaned=True)
+
+    def final(self, hard_weight=0.5, semantic_weight=0.5):
+        return np.round(self.hard * hard_weight + self.semantic * semantic_weight, 2)
+
+    def best_jd(self, hard_weight=0.5, semantic_weight=0.5):
+        """
+        Index of the best JD per resume: highest final score, ties broken by semantic score.
+        """
+        final = self.final(hard_weight, semantic_weight)
+        if final.shape[1] == 0:
+            return np.zeros(final.shape[0], dtype=np.int64)
+        top = final == final.max(axis=1, keepdims=True)
+        return np.argmax(np.where(top, self.semantic, -np.inf), axis=1)
+
+    def ranking(self, hard_weight=0.5, semantic_weight=0.5, sort=False):
+        """
+        Best JD per resume as columns (dict of arrays), ready for a DataFrame.
+        With sort=True rows are ordered by final then semantic score, best first
+        (stable), so the caller does not need to sort a copy.
+        """
+        rows = np.arange(self.shape[0])
+        best = self.best_jd(hard_weight, semantic_weight)
+        final = self.final(hard_weight, semantic_weight)[rows, best]
+        semantic = self.semantic[rows, best]
+        if sort:
+            order = np.lexsort((-semantic, -final))
+            rows, best, final, semantic = rows[order], best[order], final[order], semantic[order]
+        pairs = self.pair(rows, best)
+        return {
+            "resume_index": rows,
+            "filename": self.filenames[rows],
+            "jd_index": best,
+            "jd_name": self.jd_names[best] if len(self.jd_names) else np.array([], dtype=object),
+            "hard_score": self.hard[rows, best],
+            "semantic_score": semantic,
+            "final_score": final,
+            "verdict": verdicts_from_scores(final),
+            "matched_skills": self.matched.joined(pairs),
+            "missing_skills": self.missing.joined(pairs),
+            "duplicate_of": np.array([d or "" for d in self.duplicate_of[rows]], dtype=object),
+        }
+
+    def missing_counts(self, hard_weight=0.5, semantic_weight=0.5):
+        """
+        {skill: number of resumes missing it} against each resume's best JD, most common first.
+        """
+        rows = np.arange(self.shape[0])
+        counts = self.missing.counts(self.pair(rows, self.best_jd(hard_weight, semantic_weight)))
+        order = np.argsort(-counts, kind="stable")
+        return {self.skills[k]: int(counts[k]) for k in order if counts[k]}
+
+    @property
+    def nbytes(self):
+        return (self.hard.nbytes + self.semantic.nbytes + self.matched.nbytes
+                + self.missing.nbytes + self.texts.nbytes)
+
+def cascade_mask(hard, top_k=None, min_hard=None):
+    """
+    Pairs that survive the hard-match prefilter: per JD (column), the top_k
+    resumes by hard score (ties by resume order) and/or every resume with
+    hard >= min_hard. With neither set, every pair survives.
+    """
+    hard = np.asarray(hard)
+    if top_k is None and min_hard is None:
+        return np.ones(hard.shape, dtype=bool)
+    keep = np.zeros(hard.shape, dtype=bool)
+    if min_hard is not None:
+        keep |= hard >= min_hard
+    if top_k:
+        rows = np.arange(hard.shape[0])
+        for j in range(hard.shape[1]):
+            keep[np.lexsort((rows, -hard[:, j]))[:top_k], j] = True
+    return keep
+
+def score_matrix(resumes, jds, jd_names=None, skill_vocab=None, fuzzy_threshold=80, top_k=None, min_hard=None):
+    """
+    Score every resume against every JD once, keeping the component scores.
+    resumes: list of (filename, resume_text) or Documents; jds: list of JD texts
+    or Documents. Each document is cleaned, skill-scanned and embedded once.
+
+    Cascade mode (top_k and/or min_hard): every pair is hard-matched first, then
+    only the pairs kept by cascade_mask() get a semantic score, and resumes with
+    no surviving pair are never embedded. result.pruned counts the skipped pairs.
+    """
+    docs = [as_document(r) for r in resumes]
+    jd_docs = [as_document(jd) for jd in jds]
+    names = [d.name for d in docs]
+    if jd_names is None:
+        jd_names = [d.name or f"JD_{j}" for j, d in enumerate(jd_docs)]
+    n, m = len(docs), len(jd_docs)
+    texts = TextStore()
+    digests = [texts.put(d.digest, d.text) for d in docs]
+
+    # stage one: hard match for every pair
+    jd_skills = [sorted(jd.skills(skill_vocab)) for jd in jd_docs]
+    skills = sorted(set().union(*jd_skills)) if jd_skills else []
+    skill_id = {s: k for k, s in enumerate(skills)}
+    hard = np.zeros((n, m))
+    resume_skills = [sorted(d.skills(skill_vocab)) for d in docs]
+    hit_rows, hit_ids, miss_rows, miss_ids = [], [], [], []
+    with metrics.timed("hard_match"):
+        for j in range(m if n else 0):
+            if not jd_skills[j]:
+                continue
+            hit = _skill_hits(jd_skills[j], resume_skills, fuzzy_threshold)
+            hard[:, j] = np.round(hit.sum(axis=1) / len(jd_skills[j]) * 100.0, 2)
+            ids = np.array([skill_id[s] for s in jd_skills[j]], dtype=np.int32)
+            r, c = np.nonzero(hit)
+            hit_rows.append(r * m + j)
+            hit_ids.append(ids[c])
+            r, c = np.nonzero(~hit)
+            miss_rows.append(r * m + j)
+            miss_ids.append(ids[c])
+
+    def _sets(rows, ids):
+        rows = np.concatenate(rows) if rows else np.zeros(0, dtype=np.int64)
+        ids = np.concatenate(ids) if ids else np.zeros(0, dtype=np.int32)
+        return SkillSets.from_pairs(n * m, rows, ids, skills)
+
+    # stage two: semantic scores for the surviving pairs only
+    scored = cascade_mask(hard, top_k, min_hard)
+    sem = np.zeros((n, m))
+    live = np.flatnonzero(scored.any(axis=1))
+    if len(live) and m:
+        sem[live] = semantic_matrix(jd_docs, [docs[i] for i in live])
+        sem[~scored] = 0.0
+
+    return ScoreMatrix(names, jd_names, hard, sem, _sets(hit_rows, hit_ids), _sets(miss_rows, miss_ids),
+                       digests, texts, scored)
+
+def evaluate_batch(resumes, jds, hard_weight=0.5, semantic_weight=0.5, skill_vocab=None, fuzzy_threshold=80):
+    """
+    Evaluate every resume against every JD.
+    resumes: list of (filename, resume_text) or Documents; jds: list of JD texts or Documents.
+    Returns a list with one entry per resume, each a list of evaluate_resume-style
+    dicts (one per JD, in JD order).
+    """
+    sm = score_matrix(resumes, jds, skill_vocab=skill_vocab, fuzzy_threshold=fuzzy_threshold)
+    results = []
+    for i in range(sm.shape[0]):
+        row = []
+        text = sm.text(i)
+        for j in range(sm.shape[1]):
+            hard = float(sm.hard[i, j])
+            sem = float(sm.semantic[i, j])
+            k = sm.pair(i, j)
+            final = final_score(hard, sem, hard_weight, semantic_weight)
+            row.append({
+                "filename": sm.filenames[i],
+                "hard_score": hard,
+                "semantic_score": sem,
+                "final_score": final,
+                "verdict": verdict_from_score(final),
+                "matched_skills": ", ".join(sm.matched.skills(k)),
+                "missing_skills": ", ".join(sm.missing.skills(k)),
+                "resume_text": text
+            })
+        results.append(row)
+    return results
@@ -0,0 +1,105 @@
+# utils/skill_gaps.py
+"""
+Skill-gap analytics over the sparse pair x skill matrices of a ScoreMatrix.
+
+Rows are (resume, JD) pairs, columns are skill ids (ScoreMatrix.skills). By
+default only each resume's best JD under the current weights is counted, which
+is what the results table shows; best_only=False counts every pair. All counts
+are sparse matrix products, so slicing stays cheap at 100k+ candidates.
+"""
+import numpy as np
+
+from .scorer import VERDICT_THRESHOLDS, verdicts_from_scores
+
+VERDICTS = tuple(v for _, v in VERDICT_THRESHOLDS) + ("Low",)
+
+def selected_pairs(sm, hard_weight=0.5, semantic_weight=0.5, best_only=True):
+    """
+    Pair rows to analyse and, for each, its JD index and final score.
+    """
+    n, m = sm.shape
+    final = sm.final(hard_weight, semantic_weight)
+    if best_only:
+        resumes = np.arange(n)
+        jds = sm.best_jd(hard_weight, semantic_weight)
+    else:
+        resumes, jds = np.divmod(np.arange(n * m), m)
+    return sm.pair(resumes, jds), jds, final[resumes, jds]
+
+def group_counts(mat, rows, groups, n_groups):
+    """
+    (n_groups, n_skills) array: how many of `rows` in each group contain each skill.
+    """
+    from scipy import sparse
+    rows = np.asarray(rows, dtype=np.int64)
+    select = sparse.csr_matrix((np.ones(len(rows), dtype=np.int32), (np.asarray(groups), rows)),
+                               shape=(n_groups, mat.shape[0]))
+    return np.asarray((select @ mat.astype(np.int32)).todense())
+
+def top_k(counts, names, k=15):
+    """
+    [(skill, count)] for the k largest non-zero counts, largest first.
+    """
+    counts = np.asarray(counts)
+    nz = np.flatnonzero(counts)
+    if len(nz) > k:
+        nz = nz[np.argpartition(-counts[nz], k - 1)[:k]]
+    nz = nz[np.lexsort((nz, -counts[nz]))]
+    return [(names[i], int(counts[i])) for i in nz]
+
+def top_skills(sm, k=15, hard_weight=0.5, semantic_weight=0.5, best_only=True, kind="missing"):
+    """
+    Most frequently missing (or matched, kind="matched") skills overall.
+    """
+    rows, _, _ = selected_pairs(sm, hard_weight, semantic_weight, best_only)
+    mat = _matrix(sm, kind)
+    return top_k(group_counts(mat, rows, np.zeros(len(rows), dtype=np.int64), 1)[0], sm.skills, k)
+
+def skills_by_jd(sm, k=15, hard_weight=0.5, semantic_weight=0.5, best_only=True, kind="missing"):
+    """
+    {jd index: top-k [(skill, count)]} over the pairs assigned to each JD. Keyed
+    by index because JD names need not be unique; sm.jd_names[j] is the label.
+    """
+    rows, jds, _ = selected_pairs(sm, hard_weight, semantic_weight, best_only)
+    counts = group_counts(_matrix(sm, kind), rows, jds, sm.shape[1])
+    return {j: top_k(counts[j], sm.skills, k) for j in range(sm.shape[1])}
+
+def skills_by_verdict(sm, k=15, hard_weight=0.5, semantic_weight=0.5, best_only=True, kind="missing"):
+    """
+    {verdict: top-k [(skill, count)]} for each verdict band (High/Medium/Low).
+    """
+    rows, _, final = selected_pairs(sm, hard_weight, semantic_weight, best_only)
+    band = {v: i for i, v in enumerate(VERDICTS)}
+    groups = np.array([band[v] for v in verdicts_from_scores(final)], dtype=np.int64)
+    counts = group_counts(_matrix(sm, kind), rows, groups, len(VERDICTS))
+    return {v: top_k(counts[i], sm.skills, k) for i, v in enumerate(VERDICTS)}
+
+def cooccurrence(sm, hard_weight=0.5, semantic_weight=0.5, best_only=True, kind="missing", jd=None):
+    """
+    Sparse (n_skills, n_skills) matrix: entry (a, b) is the number of selected
+    pairs where both skills are missing (or matched). The diagonal holds the
+    per-skill counts. jd restricts the rows to one JD index.
+    """
+    rows, jds, _ = selected_pairs(sm, hard_weight, semantic_weight, best_only)
+    if jd is not None:
+        rows = rows[jds == jd]
+    sub = _matrix(sm, kind)[rows].astype(np.int32)
+    return (sub.T @ sub).tocsr()
+
+def top_pairs(co, names, k=15):
+    """
+    [(skill_a, skill_b, count)] for the k most frequent off-diagonal pairs.
+    """
+    from scipy import sparse
+    upper = sparse.triu(co, k=1).tocoo()
+    if upper.nnz == 0:
+        return []
+    order = np.lexsort((upper.col, upper.row, -upper.data))[:k]
+    return [(names[upper.row[i]], names[upper.col[i]], int(upper.data[i])) for i in order]
+
+def _matrix(sm, kind):
+    if kind == "missing":
+        return sm.missing.to_csr()
+    if kind == "matched":
+        return sm.matched.to_csr()
+    raise ValueError(f"Unknown skill matrix kind: {kind}")
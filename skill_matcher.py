@@ -0,0 +1,158 @@
+# utils/skill_matcher.py
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+
+# characters that may not touch a skill on either side (so "java" does not
+# match inside "javascript" and "sql" does not match inside "mysql")
+_LEFT = r"(?<!\w)"
+_RIGHT = r"(?![\w+#])"
+
+def normalize_term(term: str) -> str:
+    return " ".join(str(term).lower().split())
+
+def _trie_pattern(node):
+    """
+    Turn a character trie into a regex where shared prefixes are factored out,
+    e.g. ["java", "javascript"] -> "java(?:script)?".
+    """
+    end = "" in node
+    alts = []
+    for ch in sorted(k for k in node if k != ""):
+        atom = r"\s+" if ch == " " else re.escape(ch)
+        alts.append(atom + _trie_pattern(node[ch]))
+    if not alts:
+        return ""
+    if len(alts) == 1 and not end:
+        return alts[0]
+    body = "(?:" + "|".join(alts) + ")"
+    return body + "?" if end else body
+
+def build_trie_regex(terms):
+    trie = {}
+    for term in terms:
+        node = trie
+        for ch in term:
+            node = node.setdefault(ch, {})
+        node[""] = True
+    return _trie_pattern(trie)
+
+class SkillMatcher:
+    """
+    Matches a whole skill vocabulary in one regex pass over a document.
+
+    vocab is either a list of skills or a dict {canonical skill: [aliases]}.
+    Matches respect word boundaries and are reported by canonical (lowercase) name.
+    Overlapping skills are all reported ("machine learning" and "learning").
+    """
+
+    def __init__(self, vocab):
+        self.canonical = {}
+        if isinstance(vocab, dict):
+            for skill, aliases in vocab.items():
+                canon = normalize_term(skill)
+                for alias in [skill, *(aliases or [])]:
+                    self.canonical.setdefault(normalize_term(alias), canon)
+        else:
+            for skill in vocab:
+                term = normalize_term(skill)
+                self.canonical.setdefault(term, term)
+        self.canonical.pop("", None)
+        self.skills = sorted(set(self.canonical.values()))
+        if self.canonical:
+            # zero-width lookahead so a match at one position does not hide
+            # a shorter skill starting later inside it
+            body = build_trie_regex(self.canonical)
+            self.pattern = re.compile(f"{_LEFT}(?=({body}){_RIGHT})")
+        else:
+            self.pattern = None
+
+    def finditer_lower(self, text_l: str):
+        """
+        Yield (canonical skill, start, end) for every match in already-lowercased text.
+        """
+        if self.pattern is None:
+            return
+        for m in self.pattern.finditer(text_l):
+            found = m.group(1)
+            yield self.canonical[normalize_term(found)], m.start(1), m.end(1)
+
+    def find_lower(self, text_l: str):
+        """
+        Set of canonical skills found in already-lowercased text.
+        """
+        if self.pattern is None:
+            return set()
+        canonical = self.canonical
+        found = set()
+        for term in set(self.pattern.findall(text_l)):
+            found.add(canonical[normalize_term(term)])
+        return found
+
+    def find(self, text: str):
+        return self.find_lower((text or "").lower())
+
+    def find_stream(self, chunks_l):
+        """
+        find_lower over consecutive pieces of one lowercased text. Each piece is
+        searched together with the tail of the text before it, so skills spanning
+        a boundary are found; a match touching the end of the window waits for the
+        next piece (its right word boundary), and one at the very start of a tail
+        was already judged with its left context in the previous window.
+        """
+        if self.pattern is None:
+            return set()
+        keep = max(len(t) for t in self.canonical) + 1
+        canonical = self.canonical
+        found = set()
+        tail, at_start = "", True
+        for chunk in chunks_l:
+            text = tail + chunk
+            for m in self.pattern.finditer(text):
+                if m.end(1) < len(text) and (at_start or m.start(1) > 0):
+                    found.add(canonical[normalize_term(m.group(1))])
+            at_start = at_start and len(text) <= keep
+            tail = text[-keep:]
+        for m in self.pattern.finditer(tail):
+            if at_start or m.start(1) > 0:
+                found.add(canonical[normalize_term(m.group(1))])
+        return found
+
+def _vocab_key(vocab):
+    if isinstance(vocab, dict):
+        return ("dict", tuple((k, tuple(v or ())) for k, v in vocab.items()))
+    return ("list", tuple(vocab))
+
+@lru_cache(maxsize=32)
+def _matcher_for_key(key):
+    kind, items = key
+    vocab = {k: list(v) for k, v in items} if kind == "dict" else list(items)
+    return SkillMatcher(vocab)
+
+# id(vocab) -> (vocab, len(vocab), matcher): a vocabulary object seen before gets its
+# matcher without rebuilding the O(vocab) equality key; holding vocab keeps its id valid
+_BY_ID = OrderedDict()
+_BY_ID_MAX = 32
+_BY_ID_LOCK = threading.Lock()
+
+def get_matcher(vocab):
+    """
+    Compiled matcher for a vocabulary, built once and reused for equal vocabularies.
+    Repeat calls with the same list/dict object are O(1); a vocabulary edited in
+    place is only noticed if its length changes, so pass a new object instead.
+    A SkillMatcher is returned as is.
+    """
+    if isinstance(vocab, SkillMatcher):
+        return vocab
+    with _BY_ID_LOCK:
+        hit = _BY_ID.get(id(vocab))
+        if hit is not None and hit[0] is vocab and hit[1] == len(vocab):
+            _BY_ID.move_to_end(id(vocab))
+            return hit[2]
+    matcher = _matcher_for_key(_vocab_key(vocab))
+    with _BY_ID_LOCK:
+        _BY_ID[id(vocab)] = (vocab, len(vocab), matcher)
+        while len(_BY_ID) > _BY_ID_MAX:
+            _BY_ID.popitem(last=False)
+    return matcher
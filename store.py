@@ -0,0 +1,345 @@
+# utils/store.py
+"""
+Persistent results store (SQLite).
+
+Tables:
+  documents      cleaned text (zlib) of every resume/JD, by content hash
+  skills         skills found per (document, vocab version)
+  scores         component scores per (resume, JD, model version, vocab version);
+                 final/verdict use the default 0.5/0.5 weights
+  runs           one row per evaluation, with run_documents listing its resumes
+                 and JDs in order, so a past run can be reopened as a ScoreMatrix
+
+score_with_store() only computes the (resume, JD) pairs that are not stored yet
+for the current model and vocabulary, then saves the new ones.
+"""
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+
+import numpy as np
+
+from .document import as_document
+from .preprocess import DEFAULT_SKILLS
+from .result_store import SkillSets, TextStore
+from .scorer import ScoreMatrix, score_matrix, final_score, verdict_from_score
+
+DEFAULT_STORE_PATH = os.getenv("RESUME_STORE_PATH", os.path.join(".cache", "results.sqlite"))
+
+_STORE = None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    digest TEXT PRIMARY KEY, name TEXT, text BLOB, chars INTEGER, created REAL);
+CREATE TABLE IF NOT EXISTS skills (
+    digest TEXT, vocab TEXT, skills TEXT, PRIMARY KEY (digest, vocab));
+CREATE TABLE IF NOT EXISTS scores (
+    resume TEXT, jd TEXT, model TEXT, vocab TEXT,
+    hard REAL, semantic REAL, scored INTEGER, final REAL, verdict TEXT,
+    matched TEXT, missing TEXT, created REAL,
+    PRIMARY KEY (resume, jd, model, vocab));
+CREATE INDEX IF NOT EXISTS scores_top_for_jd ON scores (jd, model, vocab, final DESC);
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, created REAL, model TEXT, vocab TEXT,
+    n_resumes INTEGER, n_jds INTEGER, settings TEXT);
+CREATE TABLE IF NOT EXISTS run_documents (
+    run_id INTEGER, role TEXT, position INTEGER, digest TEXT, name TEXT,
+    PRIMARY KEY (run_id, role, position));
+"""
+
+def model_version():
+    """
+    Embedding model plus chunking settings and the embedding cache's storage dtype
+    (quantized vectors shift semantic scores); scores are only reused under the same version.
+    """
+    from . import embeddings
+    version = embeddings.MODEL_NAME
+    if embeddings.EMBED_MODE != "full":
+        version += (f"|{embeddings.EMBED_MODE}/{embeddings.EMBED_POOLING}"
+                    f"/{embeddings.CHUNK_WORDS}/{embeddings.CHUNK_OVERLAP}")
+    cache = embeddings.get_cache()
+    if cache is not None and cache.dtype != "float32":
+        version += f"|{cache.dtype}"
+    return version
+
+def vocab_version(skill_vocab=None, fuzzy_threshold=80):
+    payload = json.dumps(skill_vocab or DEFAULT_SKILLS, sort_keys=True) + f"|{fuzzy_threshold}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+class ResultsStore:
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._conn.commit()
+
+    # --- documents ---
+    def put_documents(self, docs, texts=None, skill_vocab=None, vocab=None):
+        """
+        Store documents (compressed text, reusing blobs from a TextStore when given)
+        and their skills under `vocab`.
+        """
+        now = time.time()
+        texts = texts or TextStore()
+        rows, skill_rows = [], []
+        for d in docs:
+            if d.digest not in texts:
+                texts.put(d.digest, d.text)
+            rows.append((d.digest, d.name, texts.compressed(d.digest), len(d.text), now))
+            if vocab:
+                skill_rows.append((d.digest, vocab, json.dumps(sorted(d.skills(skill_vocab)))))
+        with self._lock:
+            self._conn.executemany("INSERT OR IGNORE INTO documents VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.executemany("INSERT OR IGNORE INTO skills VALUES (?, ?, ?)", skill_rows)
+            self._conn.commit()
+
+    def get_texts(self, digests):
+        """
+        TextStore with the stored (still compressed) texts of the given digests.
+        """
+        out = TextStore()
+        wanted = sorted(set(digests))
+        with self._lock:
+            for s in range(0, len(wanted), 500):
+                part = wanted[s:s + 500]
+                q = f"SELECT digest, text FROM documents WHERE digest IN ({','.join('?' * len(part))})"
+                for digest, blob in self._conn.execute(q, part):
+                    out.put_compressed(digest, blob)
+        return out
+
+    # --- scores ---
+    def get_scores(self, resume_digests, jd_digests, model, vocab, scored_only=True):
+        """
+        {(resume, jd): (hard, semantic, scored, matched, missing)} for stored pairs.
+        """
+        resumes = sorted(set(resume_digests))
+        out = {}
+        with self._lock:
+            for jd in set(jd_digests):
+                # primary-key lookups, batched under SQLite's bound-parameter limit
+                for s in range(0, len(resumes), 500):
+                    part = resumes[s:s + 500]
+                    q = ("SELECT resume, hard, semantic, scored, matched, missing FROM scores"
+                         f" WHERE resume IN ({','.join('?' * len(part))}) AND jd = ? AND model = ? AND vocab = ?"
+                         + (" AND scored = 1" if scored_only else ""))
+                    for r, hard, sem, scored, matched, missing in self._conn.execute(q, part + [jd, model, vocab]):
+                        out[(r, jd)] = (hard, sem or 0.0, bool(scored), json.loads(matched), json.loads(missing))
+        return out
+
+    def put_scores(self, sm, jd_digests, model, vocab):
+        """
+        Store every pair of a ScoreMatrix; an unscored (cascade-pruned) pair never
+        overwrites a scored one.
+        """
+        now = time.time()
+        rows = []
+        for i, r in enumerate(sm.digests):
+            for j, jd in enumerate(jd_digests):
+                hard = float(sm.hard[i, j])
+                scored = bool(sm.scored[i, j])
+                sem = float(sm.semantic[i, j]) if scored else None
+                final = final_score(hard, sem or 0.0)
+                rows.append((r, jd, model, vocab, hard, sem, int(scored), final, verdict_from_score(final),
+                             json.dumps(sm.matched_skills(i, j)), json.dumps(sm.missing_skills(i, j)), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT INTO scores VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT (resume, jd, model, vocab) DO UPDATE SET"
+                " hard = excluded.hard, semantic = excluded.semantic, scored = excluded.scored,"
+                " final = excluded.final, verdict = excluded.verdict, matched = excluded.matched,"
+                " missing = excluded.missing, created = excluded.created"
+                " WHERE excluded.scored >= scores.scored", rows)
+            self._conn.commit()
+
+    def top_for_jd(self, jd_digest, n=10, model=None, vocab=None, hard_weight=0.5, semantic_weight=0.5):
+        """
+        Best n stored resumes for a JD, as dicts. At the default weights this walks
+        the (jd, model, vocab, final) index; other weights rank the JD's rows in SQL.
+        """
+        default = (hard_weight, semantic_weight) == (0.5, 0.5)
+        final = "s.final" if default else "ROUND(s.hard * ? + COALESCE(s.semantic, 0) * ?, 2)"
+        args = [] if default else [hard_weight, semantic_weight]
+        args += [jd_digest, model or model_version(), vocab or vocab_version(), n]
+        q = (f"SELECT s.resume, d.name, s.hard, s.semantic, {final} AS f, s.verdict, s.matched, s.missing"
+             " FROM scores s LEFT JOIN documents d ON d.digest = s.resume"
+             " WHERE s.jd = ? AND s.model = ? AND s.vocab = ?"
+             " ORDER BY f DESC, s.semantic DESC LIMIT ?")
+        with self._lock:
+            rows = self._conn.execute(q, args).fetchall()
+        out = [self._score_row(r) for r in rows]
+        if not default:
+            for row in out:
+                row["verdict"] = verdict_from_score(row["final_score"])
+        return out
+
+    def for_resume(self, resume_digest, model=None, vocab=None):
+        """
+        Every stored JD score for one resume (uses the primary key), best first.
+        """
+        q = ("SELECT s.jd, d.name, s.hard, s.semantic, s.final, s.verdict, s.matched, s.missing"
+             " FROM scores s LEFT JOIN documents d ON d.digest = s.jd"
+             " WHERE s.resume = ? AND s.model = ? AND s.vocab = ? ORDER BY s.final DESC")
+        with self._lock:
+            rows = self._conn.execute(q, (resume_digest, model or model_version(), vocab or vocab_version())).fetchall()
+        return [self._score_row(r) for r in rows]
+
+    @staticmethod
+    def _score_row(row):
+        digest, name, hard, sem, final, verdict, matched, missing = row
+        return {"digest": digest, "name": name, "hard_score": hard, "semantic_score": sem,
+                "final_score": final, "verdict": verdict,
+                "matched_skills": json.loads(matched), "missing_skills": json.loads(missing)}
+
+    # --- runs ---
+    def save_run(self, sm, jd_digests, name=None, model=None, vocab=None, settings=None):
+        """
+        Record a run's resumes and JDs. A near-duplicate resume (sm.duplicate_of) is
+        recorded under its representative's digest (sm.scored_as), whose text and
+        scores it shares.
+        """
+        now = time.time()
+        digests = sm.scored_as
+        with self._lock:
+            cur = self._conn.execute(
+                "INSERT INTO runs (name, created, model, vocab, n_resumes, n_jds, settings)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (name or time.strftime("%Y-%m-%d %H:%M:%S"), now, model or model_version(),
+                 vocab or vocab_version(), sm.shape[0], sm.shape[1], json.dumps(settings or {})))
+            run_id = cur.lastrowid
+            rows = [(run_id, "resume", i, d, str(f)) for i, (d, f) in enumerate(zip(digests, sm.filenames))]
+            rows += [(run_id, "jd", j, d, str(n)) for j, (d, n) in enumerate(zip(jd_digests, sm.jd_names))]
+            self._conn.executemany("INSERT INTO run_documents VALUES (?, ?, ?, ?, ?)", rows)
+            self._conn.commit()
+        return run_id
+
+    def list_runs(self, limit=50):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, name, created, model, vocab, n_resumes, n_jds FROM runs"
+                " ORDER BY id DESC LIMIT ?", (limit,)).fetchall()
+        keys = ("id", "name", "created", "model", "vocab", "n_resumes", "n_jds")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def load_run(self, run_id):
+        """
+        Reopen a saved run: {"scores": ScoreMatrix, "jd_texts", "jd_names", "name", "created"}.
+        """
+        with self._lock:
+            run = self._conn.execute("SELECT name, created, model, vocab FROM runs WHERE id = ?",
+                                     (run_id,)).fetchone()
+            if run is None:
+                raise KeyError(f"No run with id {run_id}")
+            docs = self._conn.execute(
+                "SELECT role, digest, name FROM run_documents WHERE run_id = ? ORDER BY role, position",
+                (run_id,)).fetchall()
+        resumes = [(d, n) for role, d, n in docs if role == "resume"]
+        jds = [(d, n) for role, d, n in docs if role == "jd"]
+        texts = self.get_texts([d for d, _ in resumes] + [d for d, _ in jds])
+        stored = self.get_scores([d for d, _ in resumes], [d for d, _ in jds], run[2], run[3], scored_only=False)
+        sm = _assemble([n for _, n in resumes], [n for _, n in jds], [d for d, _ in resumes],
+                       [d for d, _ in jds], stored, texts)
+        first = {}
+        sm.duplicate_of = np.array([None if first.setdefault(d, n) == n else first[d] for d, n in resumes],
+                                   dtype=object)
+        return {"scores": sm, "jd_texts": [texts.get(d) for d, _ in jds], "jd_names": [n for _, n in jds],
+                "name": run[0], "created": run[1]}
+
+    def stats(self):
+        with self._lock:
+            count = lambda table: self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            return {t: count(t) for t in ("documents", "scores", "runs")}
+
+def _assemble(filenames, jd_names, digests, jd_digests, pairs, texts):
+    """
+    ScoreMatrix from a {(resume digest, jd digest): (hard, semantic, scored, matched, missing)} map.
+    """
+    n, m = len(digests), len(jd_digests)
+    hard = np.zeros((n, m))
+    sem = np.zeros((n, m))
+    scored = np.zeros((n, m), dtype=bool)
+    names = sorted({s for v in pairs.values() for s in v[3] + v[4]})
+    skill_id = {s: k for k, s in enumerate(names)}
+    hit_rows, hit_ids, miss_rows, miss_ids = [], [], [], []
+    for i, r in enumerate(digests):
+        for j, jd in enumerate(jd_digests):
+            entry = pairs.get((r, jd))
+            if entry is None:
+                continue
+            hard[i, j], sem[i, j], scored[i, j] = entry[0], entry[1], entry[2]
+            for s in entry[3]:
+                hit_rows.append(i * m + j)
+                hit_ids.append(skill_id[s])
+            for s in entry[4]:
+                miss_rows.append(i * m + j)
+                miss_ids.append(skill_id[s])
+    return ScoreMatrix(filenames, jd_names, hard, sem,
+                       SkillSets.from_pairs(n * m, hit_rows, hit_ids, names),
+                       SkillSets.from_pairs(n * m, miss_rows, miss_ids, names),
+                       digests, texts, scored)
+
+def score_with_store(store, resumes, jds, jd_names=None, skill_vocab=None, fuzzy_threshold=80,
+                     top_k=None, min_hard=None):
+    """
+    score_matrix(), but (resume, JD) pairs already in the store for the current
+    model and vocabulary are read back instead of recomputed. Missing pairs are
+    scored in rectangles of resumes x JDs sharing the same gaps (e.g. one new
+    resume against every JD, or one new JD against every resume) and saved.
+    Returns (ScoreMatrix, {"reused": pairs, "computed": pairs}).
+    """
+    docs = [as_document(r) for r in resumes]
+    jd_docs = [as_document(jd) for jd in jds]
+    if jd_names is None:
+        jd_names = [d.name or f"JD_{j}" for j, d in enumerate(jd_docs)]
+    model, vocab = model_version(), vocab_version(skill_vocab, fuzzy_threshold)
+    digests = [d.digest for d in docs]
+    jd_digests = [d.digest for d in jd_docs]
+
+    pairs = store.get_scores(digests, jd_digests, model, vocab)
+    reused = sum(1 for r in digests for j in jd_digests if (r, j) in pairs)
+    texts = TextStore()
+    for d in docs:
+        texts.put(d.digest, d.text)
+
+    # group JDs by which resumes still need them, and score each group as one rectangle
+    groups = {}
+    for j, jd in enumerate(jd_digests):
+        todo = tuple(i for i, r in enumerate(digests) if (r, jd) not in pairs)
+        if todo:
+            groups.setdefault(todo, []).append(j)
+    computed = 0
+    for rows, cols in groups.items():
+        part = score_matrix([docs[i] for i in rows], [jd_docs[j] for j in cols],
+                            [jd_names[j] for j in cols], skill_vocab, fuzzy_threshold, top_k, min_hard)
+        store.put_scores(part, [jd_digests[j] for j in cols], model, vocab)
+        for a, i in enumerate(rows):
+            for b, j in enumerate(cols):
+                pairs[(digests[i], jd_digests[j])] = (float(part.hard[a, b]), float(part.semantic[a, b]),
+                                                      bool(part.scored[a, b]), part.matched_skills(a, b),
+                                                      part.missing_skills(a, b))
+        computed += len(rows) * len(cols)
+    if groups:
+        store.put_documents(docs + jd_docs, texts, skill_vocab, vocab)
+
+    sm = _assemble([d.name for d in docs], jd_names, digests, jd_digests, pairs, texts)
+    return sm, {"reused": reused, "computed": computed}
+
+def get_store():
+    """
+    Shared results store (created on first use). Set RESUME_STORE=0 to disable.
+    """
+    global _STORE
+    if _STORE is None and os.getenv("RESUME_STORE", "1") != "0":
+        _STORE = ResultsStore()
+    return _STORE
+
+def set_store(store):
+    global _STORE
+    _STORE = store
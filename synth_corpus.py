@@ -0,0 +1,129 @@
+# utils/synth_corpus.py
+"""
+Deterministic synthetic resumes and JDs for benchmarks.
+
+The same seed always produces the same texts and files, so benchmark reports
+from different runs (or branches) are comparable.
+"""
+import os
+import random
+
+from .preprocess import DEFAULT_SKILLS
+
+# approximate words of body text per size class
+SIZES = {"small": 150, "medium": 600, "large": 2500}
+FORMATS = ("txt", "docx", "pdf")
+
+_FILLER = (
+    "designed implemented maintained delivered improved reduced latency for the team "
+    "worked with stakeholders on data pipelines services dashboards reports customers "
+    "led migrated automated tested deployed monitored analysed optimised production "
+    "systems across multiple projects using modern tools and best practices"
+).split()
+_ROLES = ["Software Engineer", "Data Scientist", "ML Engineer", "Backend Developer",
+          "Data Analyst", "Frontend Developer", "DevOps Engineer"]
+_COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella", "Hooli", "Stark Industries", "Wayne Enterprises"]
+_SKILLS = sorted(set(DEFAULT_SKILLS))
+
+def _sentence(rng, skills, n_words):
+    words = []
+    while len(words) < n_words:
+        if skills and rng.random() < 0.08:
+            words.append(rng.choice(skills))
+        else:
+            words.append(rng.choice(_FILLER))
+    return " ".join(words).capitalize() + "."
+
+def make_resume(rng, size="medium", skills=None):
+    """
+    A resume with the usual sections; `skills` defaults to a random subset of the vocabulary.
+    """
+    n_words = SIZES[size]
+    skills = skills if skills is not None else rng.sample(_SKILLS, rng.randint(3, 10))
+    name = f"Candidate {rng.randint(1000, 9999)}"
+    lines = [name, f"{rng.choice(_ROLES)} | candidate{rng.randint(1, 99999)}@example.com", "",
+             "Summary", _sentence(rng, skills, 30), "", "Skills", ", ".join(skills), "", "Experience"]
+    written = 40
+    while written < n_words * 0.7:
+        lines.append(f"{rng.choice(_ROLES)} - {rng.choice(_COMPANIES)} ({rng.randint(2012, 2024)})")
+        for _ in range(rng.randint(2, 5)):
+            n = rng.randint(10, 25)
+            lines.append("- " + _sentence(rng, skills, n))
+            written += n
+    lines += ["", "Projects"]
+    while written < n_words:
+        n = rng.randint(10, 25)
+        lines.append("- " + _sentence(rng, skills, n))
+        written += n
+    lines += ["", "Education", "B.Tech in Computer Science"]
+    return "\n".join(lines)
+
+def make_jd(rng, skills=None):
+    skills = skills if skills is not None else rng.sample(_SKILLS, rng.randint(4, 8))
+    role = rng.choice(_ROLES)
+    lines = [f"Job Title: {role}", f"Company: {rng.choice(_COMPANIES)}", "",
+             "About the role", _sentence(rng, skills, 40), "",
+             "Must have skills: " + ", ".join(skills[: max(2, len(skills) // 2)]),
+             "Good to have: " + ", ".join(skills[max(2, len(skills) // 2):]), "",
+             "Responsibilities"]
+    for _ in range(5):
+        lines.append("- " + _sentence(rng, skills, rng.randint(8, 16)))
+    return "\n".join(lines)
+
+# --- file writers ---
+def write_txt(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+
+def write_docx(path, text):
+    import docx
+    document = docx.Document()
+    for line in text.splitlines():
+        document.add_paragraph(line)
+    document.save(path)
+
+def write_pdf(path, text, lines_per_page=20):
+    import fitz
+    doc = fitz.open()
+    lines = text.splitlines()
+    try:
+        for start in range(0, max(1, len(lines)), lines_per_page):
+            page = doc.new_page()
+            page.insert_textbox(fitz.Rect(40, 40, 555, 800), "\n".join(lines[start:start + lines_per_page]), fontsize=9)
+        doc.save(path)
+    finally:
+        doc.close()
+
+_WRITERS = {"txt": write_txt, "docx": write_docx, "pdf": write_pdf}
+
+def generate_texts(n_resumes, n_jds, sizes=tuple(SIZES), seed=0):
+    """
+    In-memory corpus: ([(name, size, text)], [(name, text)]).
+    """
+    rng = random.Random(seed)
+    jds = [(f"jd_{j:03d}", make_jd(rng)) for j in range(n_jds)]
+    resumes = []
+    for i in range(n_resumes):
+        size = sizes[i % len(sizes)]
+        resumes.append((f"resume_{i:05d}_{size}", size, make_resume(rng, size)))
+    return resumes, jds
+
+def generate_corpus(out_dir, n_resumes=60, n_jds=3, sizes=tuple(SIZES), formats=FORMATS, seed=0):
+    """
+    Write a corpus to out_dir/{resumes,jds}/, covering every size x format combination.
+    Returns a manifest: {"resumes": [{"path", "size", "format"}], "jds": [paths]}.
+    """
+    resumes, jds = generate_texts(n_resumes, n_jds, sizes, seed)
+    os.makedirs(os.path.join(out_dir, "resumes"), exist_ok=True)
+    os.makedirs(os.path.join(out_dir, "jds"), exist_ok=True)
+    manifest = {"resumes": [], "jds": []}
+    for name, text in jds:
+        path = os.path.join(out_dir, "jds", name + ".txt")
+        write_txt(path, text)
+        manifest["jds"].append(path)
+    for i, (name, size, text) in enumerate(resumes):
+        fmt = formats[(i // len(sizes)) % len(formats)]
+        path = os.path.join(out_dir, "resumes", f"{name}.{fmt}")
+        _WRITERS[fmt](path, text)
+        manifest["resumes"].append({"path": path, "size": size, "format": fmt})
+    return manifest
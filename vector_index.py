@@ -0,0 +1,289 @@
+# utils/vector_index.py
+"""
+Resume vector index for top-k retrieval against a new JD (NumPy only).
+
+Vectors are L2-normalized so inner product == cosine similarity.
+Two search modes:
+  - "exact": blocked matmul over every stored vector.
+  - "ivf":   vectors are clustered with spherical k-means (train()); a query only
+             scans the `nprobe` closest clusters. Higher nprobe = better recall,
+             more latency; nprobe == n_lists is exact.
+
+dtype="float16" or "int8" keeps the vectors quantized (quantize.py) at half or
+a quarter of the memory; searches score the stored codes block by block.
+"""
+import os
+import json
+
+import numpy as np
+
+from .embeddings import embed_documents_texts, normalize_rows
+from .quantize import check_dtype, quantize, dequantize, dot
+
+class ResumeIndex:
+
+    def __init__(self, dim, dtype="float32"):
+        self.dim = int(dim)
+        self.dtype = check_dtype(dtype)
+        self._vectors = np.zeros((0, self.dim), dtype=self.dtype)
+        self._scales = np.zeros(0, dtype=np.float32) if self.dtype == "int8" else None
+        self._alive = np.zeros(0, dtype=bool)
+        self._assign = np.zeros(0, dtype=np.int32)   # cluster of each row, -1 if untrained
+        self._ids = []
+        self._row_of = {}
+        self._size = 0
+        self.centroids = None
+        self._lists = None   # (order, offsets): rows grouped by cluster, rebuilt lazily
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __contains__(self, item_id):
+        return item_id in self._row_of
+
+    @property
+    def n_lists(self):
+        return 0 if self.centroids is None else len(self.centroids)
+
+    @property
+    def nbytes(self):
+        """
+        Bytes held by the stored vectors (and int8 scales).
+        """
+        n = self._vectors[:self._size].nbytes
+        return n + (self._scales[:self._size].nbytes if self._scales is not None else 0)
+
+    def _scale(self, rows):
+        return self._scales[rows] if self._scales is not None else None
+
+    # --- mutation ---
+    def _grow(self, extra):
+        need = self._size + extra
+        cap = self._vectors.shape[0]
+        if need <= cap and self._vectors.flags.writeable:
+            return
+        new_cap = max(need, cap * 2, 1024)
+        vectors = np.zeros((new_cap, self.dim), dtype=self.dtype)
+        vectors[:self._size] = self._vectors[:self._size]
+        if self._scales is not None:
+            scales = np.zeros(new_cap, dtype=np.float32)
+            scales[:self._size] = self._scales[:self._size]
+            self._scales = scales
+        alive = np.zeros(new_cap, dtype=bool)
+        alive[:self._size] = self._alive[:self._size]
+        assign = np.full(new_cap, -1, dtype=np.int32)
+        assign[:self._size] = self._assign[:self._size]
+        self._vectors, self._alive, self._assign = vectors, alive, assign
+
+    def add(self, ids, vectors):
+        """
+        Add (or replace) vectors under the given ids. An id repeated within
+        one call keeps its last vector.
+        """
+        ids = list(ids)
+        vectors = normalize_rows(np.asarray(vectors, dtype=np.float32).reshape(len(ids), self.dim))
+        last = {item_id: n for n, item_id in enumerate(ids)}
+        if len(last) < len(ids):
+            keep = sorted(last.values())
+            ids, vectors = [ids[n] for n in keep], vectors[keep]
+        self.delete([i for i in ids if i in self._row_of])
+        self._grow(len(ids))
+        start, end = self._size, self._size + len(ids)
+        self._vectors[start:end], scales = quantize(vectors, self.dtype)
+        if scales is not None:
+            self._scales[start:end] = scales
+        self._alive[start:end] = True
+        if self.centroids is not None:
+            self._assign[start:end] = self._nearest_centroid(vectors)
+        for offset, item_id in enumerate(ids):
+            self._row_of[item_id] = start + offset
+        self._ids.extend(ids)
+        self._size = end
+        self._lists = None
+
+    def add_texts(self, ids, texts, batch_size=64):
+        self.add(ids, embed_documents_texts(texts, batch_size=batch_size))
+
+    def delete(self, ids):
+        rows = [self._row_of.pop(i) for i in ids if i in self._row_of]
+        if rows:
+            self._alive[rows] = False
+            self._lists = None
+        return len(rows)
+
+    def compact(self):
+        """
+        Drop deleted rows (row numbers change; ids do not).
+        """
+        keep = np.flatnonzero(self._alive[:self._size])
+        self._vectors = np.ascontiguousarray(self._vectors[keep])
+        if self._scales is not None:
+            self._scales = np.ascontiguousarray(self._scales[keep])
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._assign = np.ascontiguousarray(self._assign[keep])
+        self._ids = [self._ids[r] for r in keep]
+        self._row_of = {item_id: r for r, item_id in enumerate(self._ids)}
+        self._size = len(keep)
+        self._lists = None
+
+    # --- clustering ---
+    def _nearest_centroid(self, vectors, block=65536):
+        # vectors may be stored codes: a positive per-row scale does not change the argmax
+        out = np.empty(len(vectors), dtype=np.int32)
+        for s in range(0, len(vectors), block):
+            out[s:s + block] = np.argmax(dot(vectors[s:s + block], None, self.centroids), axis=1)
+        return out
+
+    def train(self, n_lists=None, iters=15, sample=None, seed=0):
+        """
+        Cluster the stored vectors (spherical k-means) to enable mode="ivf".
+        Defaults to ~sqrt(n) lists, trained on a sample of up to 256 points per list.
+        """
+        rows = np.flatnonzero(self._alive[:self._size])
+        if len(rows) == 0:
+            raise ValueError("Cannot train an empty index")
+        n_lists = int(n_lists or max(1, int(np.sqrt(len(rows)))))
+        n_lists = min(n_lists, len(rows))
+        rng = np.random.default_rng(seed)
+        sample = sample or 256 * n_lists
+        train_rows = rng.choice(rows, size=min(sample, len(rows)), replace=False)
+        train_rows = np.sort(train_rows)
+        x = dequantize(np.asarray(self._vectors[train_rows]), self._scale(train_rows))
+
+        self.centroids = x[rng.choice(len(x), size=n_lists, replace=False)].copy()
+        for _ in range(iters):
+            assign = self._nearest_centroid(x)
+            counts = np.bincount(assign, minlength=n_lists)
+            order = np.argsort(assign, kind="stable")
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+            sums = np.zeros_like(self.centroids)
+            nonempty = counts > 0
+            sums[nonempty] = np.add.reduceat(x[order], starts[nonempty], axis=0)
+            empty = counts == 0
+            if empty.any():
+                # re-seed empty clusters with random training points
+                sums[empty] = x[rng.choice(len(x), size=int(empty.sum()), replace=False)]
+            self.centroids = normalize_rows(sums)
+
+        if not self._assign.flags.writeable:
+            self._grow(0)
+        self._assign[:self._size] = -1
+        self._assign[rows] = self._nearest_centroid(np.asarray(self._vectors[rows]))
+        self._lists = None
+        return self
+
+    def _cluster_lists(self):
+        if self._lists is None:
+            rows = np.flatnonzero(self._alive[:self._size])
+            assign = self._assign[rows]
+            order = np.argsort(assign, kind="stable")
+            offsets = np.searchsorted(assign[order], np.arange(self.n_lists + 1))
+            self._lists = (rows[order], offsets)
+        return self._lists
+
+    # --- search ---
+    def _topk(self, scores, rows, k):
+        if len(rows) > k:
+            part = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[part], rows[part]
+        order = np.argsort(-scores, kind="stable")
+        return [(self._ids[r], float(s)) for r, s in zip(rows[order], scores[order])]
+
+    def _search_exact(self, q, k, block):
+        best_scores = np.zeros(0, dtype=np.float32)
+        best_rows = np.zeros(0, dtype=np.int64)
+        for s in range(0, self._size, block):
+            e = min(s + block, self._size)
+            scores = dot(self._vectors[s:e], self._scale(slice(s, e)), q)
+            alive = np.flatnonzero(self._alive[s:e])
+            scores = scores[alive]
+            rows = alive + s
+            if len(rows) > k:
+                part = np.argpartition(-scores, k - 1)[:k]
+                scores, rows = scores[part], rows[part]
+            best_scores = np.concatenate([best_scores, scores])
+            best_rows = np.concatenate([best_rows, rows])
+            if len(best_rows) > 4 * k:
+                part = np.argpartition(-best_scores, k - 1)[:k]
+                best_scores, best_rows = best_scores[part], best_rows[part]
+        return self._topk(best_scores, best_rows, k)
+
+    def _search_ivf(self, q, k, nprobe):
+        order, offsets = self._cluster_lists()
+        nprobe = max(1, min(int(nprobe), self.n_lists))
+        probe = np.argpartition(-(self.centroids @ q), nprobe - 1)[:nprobe]
+        rows = np.concatenate([order[offsets[c]:offsets[c + 1]] for c in probe])
+        if len(rows) == 0:
+            return []
+        return self._topk(dot(self._vectors[rows], self._scale(rows), q), rows, k)
+
+    def search(self, query, k=50, mode="exact", nprobe=8, block=65536):
+        """
+        Top-k (id, cosine similarity) for a query vector, best first.
+        A 2D query returns one result list per row.
+        """
+        q = np.asarray(query, dtype=np.float32)
+        if q.ndim == 2:
+            return [self.search(row, k, mode, nprobe, block) for row in q]
+        q = q / max(float(np.linalg.norm(q)), 1e-10)
+        if len(self) == 0 or k <= 0:
+            return []
+        if mode == "exact":
+            return self._search_exact(q, k, block)
+        if mode == "ivf":
+            if self.centroids is None:
+                raise ValueError("Index is not trained; call train() or use mode='exact'")
+            return self._search_ivf(q, k, nprobe)
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    def search_text(self, text, k=50, mode="exact", nprobe=8):
+        return self.search(embed_documents_texts([text])[0], k, mode, nprobe)
+
+    # --- persistence ---
+    def save(self, path):
+        """
+        Write the index to a directory (deleted rows are compacted away first).
+        Ids are stored as JSON, so only str and int ids are accepted (others,
+        e.g. tuples, would not come back equal from load()).
+        """
+        bad = next((i for i in self._row_of if type(i) not in (str, int)), None)
+        if bad is not None:
+            raise TypeError(f"Only str or int ids can be saved, got {type(bad).__name__}: {bad!r}")
+        self.compact()
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "vectors.npy"), self._vectors[:self._size])
+        np.save(os.path.join(path, "assign.npy"), self._assign[:self._size])
+        if self._scales is not None:
+            np.save(os.path.join(path, "scales.npy"), self._scales[:self._size])
+        if self.centroids is not None:
+            np.save(os.path.join(path, "centroids.npy"), self.centroids)
+        elif os.path.exists(os.path.join(path, "centroids.npy")):
+            os.remove(os.path.join(path, "centroids.npy"))
+        with open(os.path.join(path, "ids.json"), "w", encoding="utf-8") as f:
+            json.dump(self._ids, f)
+        with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "size": self._size, "dtype": self.dtype}, f)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Open a saved index. With mmap=True the vectors stay on disk and are paged in
+        as searched; the first add/delete copies them into memory.
+        """
+        with open(os.path.join(path, "meta.json"), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index = cls(meta["dim"], meta.get("dtype", "float32"))
+        mode = "r" if mmap else None
+        index._vectors = np.load(os.path.join(path, "vectors.npy"), mmap_mode=mode)
+        index._assign = np.load(os.path.join(path, "assign.npy"), mmap_mode=mode)
+        if index._scales is not None:
+            index._scales = np.load(os.path.join(path, "scales.npy"), mmap_mode=mode)
+        index._size = int(meta["size"])
+        index._alive = np.ones(index._size, dtype=bool)
+        centroids = os.path.join(path, "centroids.npy")
+        if os.path.exists(centroids):
+            index.centroids = np.load(centroids)
+        with open(os.path.join(path, "ids.json"), "r", encoding="utf-8") as f:
+            index._ids = json.load(f)
+        index._row_of = {item_id: r for r, item_id in enumerate(index._ids)}
+        return index